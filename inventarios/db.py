@@ -3,13 +3,29 @@ from __future__ import annotations
 from contextlib import contextmanager
 from typing import Iterator
 
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
 from sqlalchemy.engine import Engine
 from sqlalchemy.orm import Session, sessionmaker
 
 from inventarios.models import Base
 
 
+def _sqlite_on_connect(dbapi_conn, _record) -> None:
+    # Most of these are per-connection settings, so apply them to every pooled connection
+    # (not just the first one). synchronous=NORMAL is safe under WAL: commits no longer
+    # fsync, only checkpoints do. mmap 256 MB, page cache 64 MB, temp tables in memory.
+    cur = dbapi_conn.cursor()
+    try:
+        cur.execute("PRAGMA journal_mode=WAL;")
+        cur.execute("PRAGMA synchronous=NORMAL;")
+        cur.execute("PRAGMA foreign_keys=ON;")
+        cur.execute("PRAGMA mmap_size=268435456;")
+        cur.execute("PRAGMA cache_size=-65536;")
+        cur.execute("PRAGMA temp_store=MEMORY;")
+    finally:
+        cur.close()
+
+
 def create_engine_from_url(database_url: str) -> Engine:
     # sqlite pragmas: WAL improves concurrency; foreign_keys for integrity
     if database_url.startswith("sqlite:"):
@@ -18,17 +34,61 @@ def create_engine_from_url(database_url: str) -> Engine:
             future=True,
             connect_args={"check_same_thread": False},
         )
-        with engine.connect() as conn:
-            conn.exec_driver_sql("PRAGMA journal_mode=WAL;")
-            conn.exec_driver_sql("PRAGMA foreign_keys=ON;")
+        event.listen(engine, "connect", _sqlite_on_connect)
         return engine
 
-    return create_engine(database_url, future=True)
+    # Server databases: keep enough connections for the LAN server's worker threads and
+    # ping before checkout so a connection dropped by the server isn't handed out.
+    return create_engine(
+        database_url,
+        future=True,
+        pool_size=10,
+        max_overflow=20,
+        pool_timeout=30,
+        pool_pre_ping=True,
+    )
+
+
+def warm_pool(engine: Engine, connections: int = 5) -> None:
+    """Opens `connections` pooled connections up front so the first requests don't pay for it.
+
+    They are checked out at the same time; connecting and closing in a loop would just
+    reuse the same pooled connection.
+    """
+    conns = []
+    try:
+        for _ in range(max(0, int(connections))):
+            conns.append(engine.connect())
+    except Exception:
+        pass
+    finally:
+        for c in conns:
+            c.close()
+
+
+# Bump whenever models gain tables/columns/indexes or _ensure_sqlite_schema gains a step:
+# SQLite files stamped with this version skip schema checks at startup.
+SCHEMA_VERSION = 1
 
 
 def init_db(engine: Engine) -> None:
+    sqlite = str(engine.url).startswith("sqlite:")
+    if sqlite:
+        # PRAGMA user_version lives in the DB header: one read instead of create_all's
+        # per-table checks plus every migration probe below.
+        with engine.connect() as conn:
+            if int(conn.exec_driver_sql("PRAGMA user_version;").scalar() or 0) >= SCHEMA_VERSION:
+                return
+
     Base.metadata.create_all(engine)
-    _ensure_sqlite_schema(engine)
+    # Only stamp when every migration step went through; otherwise the next start retries.
+    if not _ensure_sqlite_schema(engine):
+        return
+
+    if sqlite:
+        with engine.connect() as conn:
+            conn.exec_driver_sql(f"PRAGMA user_version = {int(SCHEMA_VERSION)};")
+            conn.commit()
 
 
 def _sqlite_columns(conn, table: str) -> set[str]:
@@ -36,11 +96,13 @@ def _sqlite_columns(conn, table: str) -> set[str]:
     return {str(r[1]) for r in rows}
 
 
-def _ensure_sqlite_schema(engine: Engine) -> None:
+def _ensure_sqlite_schema(engine: Engine) -> bool:
+    """Applies the SQLite migrations; returns False if any step failed (e.g. locked DB)."""
     url = str(engine.url)
     if not url.startswith("sqlite:"):
-        return
+        return True
 
+    ok = True
     with engine.connect() as conn:
         # products.category
         try:
@@ -48,8 +110,8 @@ def _ensure_sqlite_schema(engine: Engine) -> None:
             if "category" not in cols:
                 conn.exec_driver_sql("ALTER TABLE products ADD COLUMN category VARCHAR(80) NOT NULL DEFAULT '';" )
         except Exception:
-            # If table doesn't exist yet, create_all already handled it.
-            pass
+            # e.g. database locked: leave the file unstamped so the next start retries.
+            ok = False
 
         # sales payment fields
         try:
@@ -63,7 +125,7 @@ def _ensure_sqlite_schema(engine: Engine) -> None:
             if "change_given" not in cols:
                 conn.exec_driver_sql("ALTER TABLE sales ADD COLUMN change_given NUMERIC(12,2);")
         except Exception:
-            pass
+            ok = False
 
         # cash_closes extended fields (cierre de caja + retiros + arrastre)
         try:
@@ -87,8 +149,7 @@ def _ensure_sqlite_schema(engine: Engine) -> None:
                     "ALTER TABLE cash_closes ADD COLUMN carry_to_next_day NUMERIC(12,2) NOT NULL DEFAULT 0;"
                 )
         except Exception:
-            # Table may not exist yet; create_all handles it.
-            pass
+            ok = False
 
         # cash_days: track manual opening override
         try:
@@ -98,9 +159,27 @@ def _ensure_sqlite_schema(engine: Engine) -> None:
                     "ALTER TABLE cash_days ADD COLUMN opening_cash_manual INTEGER NOT NULL DEFAULT 0;"
                 )
         except Exception:
-            pass
+            ok = False
+
+        # Indexes added after the first release: create_all skips them on existing tables.
+        try:
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_cash_moves_day_kind_created_at "
+                "ON cash_moves (day, kind, created_at);"
+            )
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_cash_closes_day_created_at "
+                "ON cash_closes (day, created_at);"
+            )
+            conn.exec_driver_sql(
+                "CREATE INDEX IF NOT EXISTS ix_sales_created_at_payment_method "
+                "ON sales (created_at, payment_method, total);"
+            )
+        except Exception:
+            ok = False
 
         conn.commit()
+    return ok
 
 
 def make_session_factory(engine: Engine) -> sessionmaker[Session]:
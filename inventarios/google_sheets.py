@@ -26,6 +26,7 @@ Uso:
 from __future__ import annotations
 
 import logging
+import threading
 from dataclasses import dataclass
 from decimal import Decimal
 from pathlib import Path
@@ -42,17 +43,31 @@ try:
     from google.oauth2 import service_account
     from google_auth_oauthlib.flow import InstalledAppFlow
     from googleapiclient.discovery import build
+    from googleapiclient.errors import HttpError
     GOOGLE_SHEETS_AVAILABLE = True
 except ImportError:
     GOOGLE_SHEETS_AVAILABLE = False
+
+    class HttpError(Exception):  # type: ignore[no-redef]
+        """Marcador: sin googleapiclient no hay llamadas a la API."""
+
     logger.info("Google Sheets libraries not available. Install with: pip install google-auth google-auth-oauthlib google-api-python-client")
 
 
 # If modifying scopes, delete token.json
 SCOPES = ['https://www.googleapis.com/auth/spreadsheets']
 
+# Reintentos para lecturas/escrituras idempotentes: googleapiclient reintenta 429 y 5xx
+# con backoff exponencial y jitter, así una ráfaga de sincronizaciones no falla por cuota.
+API_RETRIES = 5
+
+# Varios clientes (uno por hoja) pueden pedir credenciales a la vez desde hilos distintos.
+# Serializar evita dos flujos OAuth en el navegador o dos refresh escribiendo token.json:
+# el segundo ya encuentra el token válido que dejó el primero.
+_credentials_lock = threading.Lock()
 
-@dataclass
+
+@dataclass(frozen=True, slots=True)
 class SheetProduct:
     """Producto en formato de Google Sheets."""
     key: str
@@ -69,6 +84,8 @@ class GoogleSheetsSync:
         self.settings = settings or Settings()
         self.enabled = self.settings.GOOGLE_SHEETS_ENABLED and GOOGLE_SHEETS_AVAILABLE
         self._service = None
+        # Títulos de hojas que ya sabemos que existen (evita leer metadatos en cada export).
+        self._known_sheets: set[str] = set()
         
         if not GOOGLE_SHEETS_AVAILABLE and self.settings.GOOGLE_SHEETS_ENABLED:
             logger.warning(
@@ -152,7 +169,8 @@ class GoogleSheetsSync:
         if self._service:
             return self._service
             
-        creds = self._get_credentials()
+        with _credentials_lock:
+            creds = self._get_credentials()
         if not creds:
             return None
             
@@ -206,23 +224,9 @@ class GoogleSheetsSync:
             
             values = headers + rows
             
-            # Limpiar hoja y escribir datos
-            range_name = f'{worksheet_name}!A1:D{len(values)}'
-            
-            # Primero limpiar la hoja
-            service.spreadsheets().values().clear(
-                spreadsheetId=spreadsheet_id,
-                range=f'{worksheet_name}!A:D'
-            ).execute()
-            
-            # Luego escribir datos
-            body = {'values': values}
-            result = service.spreadsheets().values().update(
-                spreadsheetId=spreadsheet_id,
-                range=range_name,
-                valueInputOption='USER_ENTERED',  # Permite que Google interprete los valores
-                body=body
-            ).execute()
+            result = self._clear_and_write(service, spreadsheet_id, worksheet_name, 'A:D', 'D', values)
+            if result is None:
+                return False
             
             updated = result.get('updatedCells', 0)
             logger.info(f"Exportados {len(products)} productos a Google Sheets ({updated} celdas actualizadas)")
@@ -256,7 +260,7 @@ class GoogleSheetsSync:
             result = service.spreadsheets().values().get(
                 spreadsheetId=spreadsheet_id,
                 range=range_name
-            ).execute()
+            ).execute(num_retries=API_RETRIES)
             
             rows = result.get('values', [])
             products = []
@@ -317,15 +321,22 @@ class GoogleSheetsSync:
     
     def _ensure_worksheet_exists(self, service, spreadsheet_id: str, worksheet_name: str) -> bool:
         """Asegura que la hoja existe, creándola si es necesario."""
+        if worksheet_name in self._known_sheets:
+            return True
         try:
-            # Obtener información del spreadsheet para ver las hojas existentes
-            spreadsheet = service.spreadsheets().get(spreadsheetId=spreadsheet_id).execute()
+            # Obtener solo los títulos de las hojas existentes (no todas las propiedades)
+            spreadsheet = service.spreadsheets().get(
+                spreadsheetId=spreadsheet_id,
+                fields='sheets.properties.title'
+            ).execute(num_retries=API_RETRIES)
             sheets = spreadsheet.get('sheets', [])
+            self._known_sheets.update(
+                sheet.get('properties', {}).get('title') for sheet in sheets
+            )
             
             # Verificar si la hoja ya existe
-            for sheet in sheets:
-                if sheet.get('properties', {}).get('title') == worksheet_name:
-                    return True
+            if worksheet_name in self._known_sheets:
+                return True
             
             # Crear la hoja si no existe
             body = {
@@ -338,6 +349,7 @@ class GoogleSheetsSync:
                 }]
             }
             service.spreadsheets().batchUpdate(spreadsheetId=spreadsheet_id, body=body).execute()
+            self._known_sheets.add(worksheet_name)
             logger.info(f"Creada nueva hoja: {worksheet_name}")
             return True
             
@@ -345,6 +357,40 @@ class GoogleSheetsSync:
             logger.error(f"Error verificando/creando hoja {worksheet_name}: {e}")
             return False
     
+    def _clear_and_write(
+        self, service, spreadsheet_id: str, worksheet_name: str, clear_cols: str, last_col: str, values: list
+    ) -> dict | None:
+        """Limpia la hoja y escribe `values` desde A1.
+
+        Si la hoja fue borrada o renombrada en el spreadsheet (la API responde 400
+        "Unable to parse range"), la olvida del caché de títulos, la vuelve a crear y
+        reintenta una vez. Devuelve None si no se pudo crear.
+        """
+        for attempt in range(2):
+            try:
+                # Primero limpiar la hoja
+                service.spreadsheets().values().clear(
+                    spreadsheetId=spreadsheet_id,
+                    range=f'{worksheet_name}!{clear_cols}'
+                ).execute(num_retries=API_RETRIES)
+                
+                # Luego escribir datos
+                return service.spreadsheets().values().update(
+                    spreadsheetId=spreadsheet_id,
+                    range=f'{worksheet_name}!A1:{last_col}{len(values)}',
+                    valueInputOption='USER_ENTERED',  # Permite que Google interprete los valores
+                    body={'values': values}
+                ).execute(num_retries=API_RETRIES)
+            except HttpError as e:
+                missing = getattr(e.resp, 'status', None) == 400 and 'Unable to parse range' in str(e)
+                if attempt or not missing:
+                    raise
+                self._known_sheets.discard(worksheet_name)
+                logger.info(f"La hoja {worksheet_name} ya no existe; se vuelve a crear")
+                if not self._ensure_worksheet_exists(service, spreadsheet_id, worksheet_name):
+                    return None
+        return None
+
     def export_sales(self, sales: list) -> bool:
         """
         Exporta ventas a la hoja VENTAS en Google Sheets.
@@ -382,8 +428,9 @@ class GoogleSheetsSync:
             
             for sale in sales:
                 sale_id = sale.id
-                fecha = sale.created_at.strftime("%Y-%m-%d")
-                hora = sale.created_at.strftime("%H:%M:%S")
+                dt = sale.created_at
+                fecha = f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d}"
+                hora = f"{dt.hour:02d}:{dt.minute:02d}:{dt.second:02d}"
                 metodo = sale.payment_method.upper()
                 total_venta = float(sale.total)
                 
@@ -415,23 +462,9 @@ class GoogleSheetsSync:
                 ]
                 rows.append(row)
             
-            # Limpiar hoja y escribir datos
-            range_name = f'{worksheet_name}!A1:G{len(rows)}'
-            
-            # Primero limpiar la hoja
-            service.spreadsheets().values().clear(
-                spreadsheetId=spreadsheet_id,
-                range=f'{worksheet_name}!A:J'
-            ).execute()
-            
-            # Luego escribir datos
-            body = {'values': rows}
-            result = service.spreadsheets().values().update(
-                spreadsheetId=spreadsheet_id,
-                range=range_name,
-                valueInputOption='USER_ENTERED',
-                body=body
-            ).execute()
+            result = self._clear_and_write(service, spreadsheet_id, worksheet_name, 'A:J', 'G', rows)
+            if result is None:
+                return False
             
             updated = result.get('updatedCells', 0)
             logger.info(f"Exportadas {len(sales)} ventas a Google Sheets ({updated} celdas)")
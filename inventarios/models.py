@@ -3,7 +3,7 @@ from __future__ import annotations
 from datetime import datetime
 from decimal import Decimal
 
-from sqlalchemy import DateTime, ForeignKey, Integer, Numeric, String, Text, UniqueConstraint
+from sqlalchemy import DateTime, ForeignKey, Index, Integer, Numeric, String, Text, UniqueConstraint
 from sqlalchemy.orm import DeclarativeBase, Mapped, mapped_column, relationship
 
 
@@ -56,6 +56,9 @@ class Sale(Base):
 
     lines: Mapped[list["SaleLine"]] = relationship("SaleLine", back_populates="sale", cascade="all, delete-orphan")
 
+    # Covers the per-day totals (range on created_at, group by payment_method, sum total).
+    __table_args__ = (Index("ix_sales_created_at_payment_method", "created_at", "payment_method", "total"),)
+
 
 class SaleLine(Base):
     __tablename__ = "sale_lines"
@@ -109,6 +112,11 @@ class CashClose(Base):
 
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    __table_args__ = (
+        # Previous-close lookup: WHERE day < ? ORDER BY day DESC, created_at DESC LIMIT 1
+        Index("ix_cash_closes_day_created_at", "day", "created_at"),
+    )
+
 
 class CashDay(Base):
     __tablename__ = "cash_days"
@@ -133,6 +141,11 @@ class CashMove(Base):
     amount: Mapped[Decimal] = mapped_column(Numeric(12, 2), nullable=False, default=Decimal("0.00"))
     notes: Mapped[str | None] = mapped_column(Text, nullable=True)
 
+    __table_args__ = (
+        # Covers the cash panel query: WHERE day = ? AND kind = ? ORDER BY created_at DESC LIMIT n
+        Index("ix_cash_moves_day_kind_created_at", "day", "kind", "created_at"),
+    )
+
 
 class StockMove(Base):
     __tablename__ = "stock_moves"
@@ -2,15 +2,41 @@ from __future__ import annotations
 
 from collections import Counter
 from dataclasses import dataclass
-from datetime import datetime, date
+from datetime import datetime, date, timedelta
 from decimal import Decimal
+from itertools import islice
+from typing import Iterable
 
-from sqlalchemy import func, select
-from sqlalchemy.orm import Session
+from sqlalchemy import case, func, lambda_stmt, select, true
+from sqlalchemy.orm import Session, selectinload
 from sqlalchemy.dialects.sqlite import insert
 
 from inventarios.tipos_importacion import ProductoImportado
-from inventarios.models import Product, ProductImage, Sale, SaleLine, StockMove
+from inventarios.models import CashClose, CashMove, Product, ProductImage, Sale, SaleLine, StockMove
+
+
+def day_bounds(day_iso: str) -> tuple[datetime, datetime]:
+    """[start, end) datetimes for a YYYY-MM-DD day.
+
+    Filtering created_at by range (instead of date(created_at) == day) lets the
+    database use the index on sales.created_at.
+    """
+    start = datetime.strptime(day_iso, "%Y-%m-%d")
+    return start, start + timedelta(days=1)
+
+
+_Q2 = Decimal("0.01")
+
+
+def _money(v) -> Decimal:
+    """Amount from the DB rounded to cents.
+
+    Numeric columns and their SUMs already come back as Decimal, so only other
+    types (None, int, float) pay for the str() round-trip.
+    """
+    if not isinstance(v, Decimal):
+        v = Decimal(str(v or 0))
+    return v.quantize(_Q2)
 
 
 @dataclass(frozen=True)
@@ -25,35 +51,27 @@ class ProductRepo:
     def __init__(self, session: Session):
         self.session = session
 
-    def upsert_many(self, products: list[ProductoImportado]) -> int:
-        if not products:
-            return 0
+    # Rows per executemany call in upsert_many; bounds the parameter dicts held at once.
+    UPSERT_CHUNK = 1000
 
+    def upsert_many(self, products: Iterable[ProductoImportado]) -> int:
         # La hoja puede contener llaves repetidas; conservar la última ocurrencia.
+        # Accepts any iterable (e.g. a generator) so callers needn't build a list first.
         dedup: dict[str, ProductoImportado] = {}
         for p in products:
             dedup[p.key] = p
+        if not dedup:
+            return 0
         products = list(dedup.values())
 
-        # Fast path for SQLite: single executemany UPSERT.
+        # Fast path for SQLite: executemany UPSERT of the rows that actually differ.
         bind = self.session.get_bind()
         if bind is not None and getattr(bind.dialect, "name", "") == "sqlite":
             now = datetime.utcnow()
-            rows = []
-            for p in products:
-                rows.append(
-                    {
-                        "key": p.key,
-                        "producto": p.producto,
-                        "descripcion": p.descripcion,
-                        "unidades": int(p.unidades),
-                        "precio_final": Decimal(str(p.precio_final)).quantize(Decimal("0.01")),
-                        "category": "",  # only applies on insert; updates keep existing
-                        "updated_at": now,
-                    }
-                )
 
-            stmt = insert(Product).values(rows)
+            # executemany: one compiled statement, rows sent as parameter sets (batched by
+            # SQLAlchemy's insertmanyvalues) instead of one giant multi-VALUES statement.
+            stmt = insert(Product)
             # Do NOT overwrite manual category on update.
             stmt = stmt.on_conflict_do_update(
                 index_elements=[Product.key],
@@ -65,7 +83,41 @@ class ProductRepo:
                     "updated_at": stmt.excluded.updated_at,
                 },
             )
-            self.session.execute(stmt)
+            it = iter(products)
+            while batch := list(islice(it, self.UPSERT_CHUNK)):
+                # Most re-imports leave the bulk of the sheet untouched; compare against the
+                # stored values and skip rows that would be rewritten with identical data.
+                current = {
+                    k: (producto, descripcion, unidades, precio)
+                    for k, producto, descripcion, unidades, precio in self.session.execute(
+                        select(
+                            Product.key,
+                            Product.producto,
+                            Product.descripcion,
+                            Product.unidades,
+                            Product.precio_final,
+                        ).where(Product.key.in_([p.key for p in batch]))
+                    )
+                }
+                rows = []
+                for p in batch:
+                    unidades = int(p.unidades)
+                    precio = Decimal(str(p.precio_final)).quantize(Decimal("0.01"))
+                    if current.get(p.key) == (p.producto, p.descripcion, unidades, precio):
+                        continue
+                    rows.append(
+                        {
+                            "key": p.key,
+                            "producto": p.producto,
+                            "descripcion": p.descripcion,
+                            "unidades": unidades,
+                            "precio_final": precio,
+                            "category": "",  # only applies on insert; updates keep existing
+                            "updated_at": now,
+                        }
+                    )
+                if rows:
+                    self.session.execute(stmt, rows)
             return len(products)
 
         # Generic fallback (non-sqlite)
@@ -92,23 +144,55 @@ class ProductRepo:
                 self.session.add(row)
                 changed += 1
             else:
+                unidades = int(p.unidades)
+                precio = Decimal(str(p.precio_final)).quantize(Decimal("0.01"))
+                changed += 1
+                if (row.producto, row.descripcion, row.unidades, row.precio_final) == (
+                    p.producto,
+                    p.descripcion,
+                    unidades,
+                    precio,
+                ):
+                    continue
                 row.producto = p.producto
                 row.descripcion = p.descripcion
-                row.unidades = int(p.unidades)
-                row.precio_final = Decimal(str(p.precio_final)).quantize(Decimal("0.01"))
+                row.unidades = unidades
+                row.precio_final = precio
                 row.updated_at = now
-                changed += 1
 
         return changed
 
-    def list(self, q: str = "", limit: int = 300) -> list[Product]:
-        stmt = select(Product)
+    @staticmethod
+    def _search(stmt, q: str, limit: int):
         qn = (q or "").strip()
         if qn:
             like = f"%{qn}%"
             stmt = stmt.where((Product.producto.like(like)) | (Product.descripcion.like(like)))
-        stmt = stmt.order_by(Product.producto.asc()).limit(int(limit))
-        return self.session.execute(stmt).scalars().all()
+        return stmt.order_by(Product.producto.asc()).limit(int(limit))
+
+    def list(self, q: str = "", limit: int = 300) -> list[Product]:
+        return self.session.execute(self._search(select(Product), q, limit)).scalars().all()
+
+    def count(self) -> int:
+        return int(self.session.execute(select(func.count()).select_from(Product)).scalar_one())
+
+    def list_with_images(self, q: str = "", limit: int = 300):
+        """Same search as list(), as plain rows with the image path from a LEFT JOIN.
+
+        Row fields: key, producto, descripcion, unidades, precio_final, category, image_path.
+        Returns the Result, streamed in chunks of 100 rows; iterate it inside the session.
+        """
+        stmt = select(
+            Product.key,
+            Product.producto,
+            Product.descripcion,
+            Product.unidades,
+            Product.precio_final,
+            Product.category,
+            ProductImage.path.label("image_path"),
+        ).outerjoin(ProductImage, ProductImage.product_key == Product.key)
+        stmt = self._search(stmt, q, limit).execution_options(yield_per=100)
+        return self.session.execute(stmt)
 
     def list_categories(self) -> list[str]:
         stmt = (
@@ -397,34 +481,103 @@ class SalesRepo:
                 "sales_count": 0,
             }
 
-        # SQLite: date(created_at) yields YYYY-MM-DD
-        sums_stmt = (
-            select(
-                Sale.payment_method,
-                func.coalesce(func.sum(Sale.total), 0),
+        try:
+            start, end = day_bounds(day)
+        except ValueError:
+            start = end = None
+        sums: dict[str, Decimal] = {}
+        cnt = 0
+        if start is not None:
+            # lambda_stmt caches the constructed statement; start/end become bound parameters.
+            stmt = lambda_stmt(
+                lambda: select(
+                    Sale.payment_method,
+                    func.coalesce(func.sum(Sale.total), 0),
+                    func.count(Sale.id),
+                )
+                .where((Sale.created_at >= start) & (Sale.created_at < end))
+                .group_by(Sale.payment_method)
             )
-            .where(func.date(Sale.created_at) == day)
-            .group_by(Sale.payment_method)
-        )
-        sums = {str(method or "cash"): Decimal(str(total or 0)) for method, total in self.session.execute(sums_stmt).all()}
+            for method, total, n in self.session.execute(stmt).all():
+                sums[str(method or "cash")] = _money(total)
+                cnt += int(n or 0)
 
-        cnt = self.session.execute(select(func.count(Sale.id)).where(func.date(Sale.created_at) == day)).scalar_one()
-
-        cash_total = sums.get("cash", Decimal("0"))
-        card_total = sums.get("card", Decimal("0"))
-        nequi_total = sums.get("nequi", Decimal("0"))
-        virtual_total = sums.get("virtual", Decimal("0"))
-        gross_total = (cash_total + card_total + nequi_total + virtual_total).quantize(Decimal("0.01"))
+        zero = Decimal("0.00")
+        cash_total = sums.get("cash", zero)
+        card_total = sums.get("card", zero)
+        nequi_total = sums.get("nequi", zero)
+        virtual_total = sums.get("virtual", zero)
+        gross_total = (cash_total + card_total + nequi_total + virtual_total).quantize(_Q2)
 
         return {
-            "gross_total": Decimal(str(gross_total)).quantize(Decimal("0.01")),
-            "cash_total": Decimal(str(cash_total)).quantize(Decimal("0.01")),
-            "card_total": Decimal(str(card_total)).quantize(Decimal("0.01")),
-            "nequi_total": Decimal(str(nequi_total)).quantize(Decimal("0.01")),
-            "virtual_total": Decimal(str(virtual_total)).quantize(Decimal("0.01")),
+            "gross_total": gross_total,
+            "cash_total": cash_total,
+            "card_total": card_total,
+            "nequi_total": nequi_total,
+            "virtual_total": virtual_total,
             "sales_count": int(cnt),
         }
 
+    def panel_totals_for_day(self, day_iso: str) -> dict:
+        """totals_for_day plus the day's withdrawals total and last close, in one query.
+
+        Shared by the cash panel and the cash close so both report the same figures.
+        """
+        day = (day_iso or "").strip()
+
+        def _by_method(method: str):
+            # Same bucketing as totals_for_day: a missing payment method counts as cash.
+            paid_with = func.coalesce(Sale.payment_method, "cash") == method
+            return func.coalesce(func.sum(case((paid_with, Sale.total), else_=0)), 0)
+
+        start, end = day_bounds(day)
+        sales_q = (
+            select(
+                _by_method("cash").label("cash_total"),
+                _by_method("card").label("card_total"),
+                _by_method("nequi").label("nequi_total"),
+                _by_method("virtual").label("virtual_total"),
+                func.count(Sale.id).label("sales_count"),
+            )
+            .where((Sale.created_at >= start) & (Sale.created_at < end))
+            .subquery()
+        )
+        withdrawals_q = (
+            select(func.coalesce(func.sum(CashMove.amount), 0).label("withdrawals_total"))
+            .where((CashMove.day == day) & (CashMove.kind == "withdrawal"))
+            .subquery()
+        )
+        last_close_q = (
+            select(
+                CashClose.created_at.label("close_created_at"),
+                CashClose.carry_to_next_day,
+                CashClose.cash_counted,
+                CashClose.cash_diff,
+            )
+            .where(CashClose.day == day)
+            .order_by(CashClose.created_at.desc())
+            .limit(1)
+            .subquery()
+        )
+        stmt = select(sales_q, withdrawals_q, last_close_q).select_from(
+            sales_q.join(withdrawals_q, true()).outerjoin(last_close_q, true())
+        )
+        r = self.session.execute(stmt).mappings().one()
+
+        t = {k: _money(r[k]) for k in ("cash_total", "card_total", "nequi_total", "virtual_total")}
+        t["gross_total"] = (t["cash_total"] + t["card_total"] + t["nequi_total"] + t["virtual_total"]).quantize(_Q2)
+        t["sales_count"] = int(r["sales_count"] or 0)
+        t["withdrawals_total"] = _money(r["withdrawals_total"])
+        t["last_close"] = None
+        if r["close_created_at"] is not None:
+            t["last_close"] = {
+                "created_at": r["close_created_at"],
+                "carry_to_next_day": r["carry_to_next_day"],
+                "cash_counted": r["cash_counted"],
+                "cash_diff": r["cash_diff"],
+            }
+        return t
+
     def list_sales_summary(self, limit: int = 200) -> list[dict]:
         lim = max(1, min(int(limit or 200), 500))
         stmt = (
@@ -458,7 +611,7 @@ class SalesRepo:
                 {
                     "id": int(sale_id),
                     "created_at": created_at,
-                    "total": Decimal(str(total)).quantize(Decimal("0.01")),
+                    "total": _money(total),
                     "items": int(items),
                     "payment_method": str(payment_method or "cash"),
                     "products_summary": products_summary,
@@ -466,13 +619,47 @@ class SalesRepo:
             )
         return out
 
-    def list_sales(self, limit: int = 200) -> list[Sale]:
+    def get_details(self, sale_id: int) -> tuple:
+        """Header and lines of one sale as column rows, in a single query.
+
+        Returns (header, lines); header is None when the sale doesn't exist. The header
+        row carries created_at, total, payment_method and items (SUM(qty) computed by
+        the database as a window over the joined lines).
+        """
+        stmt = (
+            select(
+                Sale.created_at,
+                Sale.total,
+                Sale.payment_method,
+                func.coalesce(func.sum(SaleLine.qty).over(), 0).label("items"),
+                SaleLine.id.label("line_id"),
+                SaleLine.product_key,
+                SaleLine.producto,
+                SaleLine.descripcion,
+                SaleLine.qty,
+                SaleLine.unit_price,
+                SaleLine.line_total,
+            )
+            .outerjoin(SaleLine, SaleLine.sale_id == Sale.id)
+            .where(Sale.id == int(sale_id))
+            .order_by(SaleLine.id.asc())
+        )
+        rows = self.session.execute(stmt).all()
+        if not rows:
+            return None, []
+        # A sale without lines yields one row whose line columns are NULL.
+        return rows[0], [r for r in rows if r.line_id is not None]
+
+    def list_sales(self, limit: int = 200, with_lines: bool = False) -> list[Sale]:
         stmt = select(Sale).order_by(Sale.created_at.desc()).limit(int(limit))
+        if with_lines:
+            # One extra IN (...) query for all lines instead of a lazy load per sale.
+            stmt = stmt.options(selectinload(Sale.lines))
         return self.session.execute(stmt).scalars().all()
 
     def total_sold(self) -> Decimal:
         v = self.session.execute(select(func.coalesce(func.sum(Sale.total), 0))).scalar_one()
-        return Decimal(str(v)).quantize(Decimal("0.01"))
+        return _money(v)
 
     def total_sold_by_day(self, limit_days: int = 30) -> list[tuple[date, Decimal]]:
         # SQLite date() groups by day in UTC-ish local, adequate for POS.
@@ -485,7 +672,7 @@ class SalesRepo:
         rows = self.session.execute(stmt).all()
         out: list[tuple[date, Decimal]] = []
         for d, total in rows:
-            out.append((date.fromisoformat(d), Decimal(str(total)).quantize(Decimal("0.01"))))
+            out.append((date.fromisoformat(d), _money(total)))
         return out
 
     def top_products(self, limit: int = 10) -> list[TopProduct]:
@@ -508,7 +695,7 @@ class SalesRepo:
                     product_key=str(key),
                     producto=str(producto),
                     qty=int(qty),
-                    total=Decimal(str(total)).quantize(Decimal("0.01")),
+                    total=_money(total),
                 )
             )
         return out
@@ -31,6 +31,8 @@ class Settings:
     GOOGLE_CREDENTIALS_FILE: str = os.environ.get("GOOGLE_CREDENTIALS_FILE", "credentials.json")
     GOOGLE_TOKEN_FILE: str = os.environ.get("GOOGLE_TOKEN_FILE", "token.json")
     GOOGLE_SHEETS_SYNC_INTERVAL_SECONDS: int = int(os.environ.get("GOOGLE_SHEETS_SYNC_INTERVAL_SECONDS", "300"))
+    # Export inventory/sales automatically after each change (requires GOOGLE_SHEETS_ENABLED)
+    GOOGLE_SHEETS_AUTO_EXPORT: bool = os.environ.get("GOOGLE_SHEETS_AUTO_EXPORT", "true").lower() == "true"
 
     def _default_windows_instance_dir(self) -> Path:
         base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA")
@@ -1,6 +1,8 @@
 from __future__ import annotations
 
 import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
 
 from inventarios.db import session_scope
@@ -11,6 +13,9 @@ from inventarios.tipos_importacion import ProductoImportado
 
 logger = logging.getLogger(__name__)
 
+# Hoja fija que usa GoogleSheetsSync.export_sales.
+HOJA_VENTAS = "VENTAS"
+
 
 @dataclass(frozen=True)
 class ResultadoSync:
@@ -33,16 +38,38 @@ class SincronizadorGoogleSheets:
     def __init__(self, session_factory, settings: Settings):
         self._session_factory = session_factory
         self._settings = settings
-
-    def _sync(self) -> GoogleSheetsSync:
-        return GoogleSheetsSync(self._settings)
+        # One client per worksheet: the googleapiclient service is not thread-safe, so the
+        # VENTAS export (which may run alongside the inventory sync) gets its own.
+        self._clients: dict[str, GoogleSheetsSync] = {}
+        # Each export clears a worksheet and rewrites it; writers to the same worksheet
+        # must not interleave.
+        self._locks: dict[str, threading.Lock] = {}
+        self._guard = threading.Lock()
+
+    def _hoja_inventario(self) -> str:
+        return self._settings.GOOGLE_SHEETS_WORKSHEET_NAME
+
+    def _sync(self, hoja: str | None = None) -> GoogleSheetsSync:
+        # Reuse clients so credentials and the API service (and its HTTP connection)
+        # are built once instead of on every export.
+        hoja = hoja or self._hoja_inventario()
+        with self._guard:
+            gs = self._clients.get(hoja)
+            if gs is None:
+                gs = self._clients[hoja] = GoogleSheetsSync(self._settings)
+            return gs
+
+    def _lock(self, hoja: str) -> threading.Lock:
+        with self._guard:
+            return self._locks.setdefault(hoja, threading.Lock())
 
     def importar_inventario(self) -> dict:
         sync = self._sync()
         if not sync.enabled:
             return {"ok": False, "error": "Google Sheets no está configurado. Revisa el archivo .env"}
 
-        productos_sheet = sync.import_products()
+        with self._lock(self._hoja_inventario()):
+            productos_sheet = sync.import_products()
         if not productos_sheet:
             return {"ok": False, "error": "No se encontraron productos en Google Sheets"}
 
@@ -69,7 +96,7 @@ class SincronizadorGoogleSheets:
         if not sync.enabled:
             return {"ok": False, "error": "Google Sheets no está configurado. Revisa el archivo .env"}
 
-        with session_scope(self._session_factory) as session:
+        with self._lock(self._hoja_inventario()), session_scope(self._session_factory) as session:
             repo = ProductRepo(session)
             productos_db = repo.list(limit=9999)
 
@@ -85,13 +112,13 @@ class SincronizadorGoogleSheets:
         return {"ok": True, "exported": len(productos_db), "url": sync.get_spreadsheet_url(), "target": "Google Sheets"}
 
     def exportar_ventas(self, limit: int = 500) -> dict:
-        sync = self._sync()
+        sync = self._sync(HOJA_VENTAS)
         if not sync.enabled:
             return {"ok": False, "error": "Google Sheets no está configurado"}
 
-        with session_scope(self._session_factory) as session:
+        with self._lock(HOJA_VENTAS), session_scope(self._session_factory) as session:
             sales_repo = SalesRepo(session)
-            sales = sales_repo.list_sales(limit=int(limit or 500))
+            sales = sales_repo.list_sales(limit=int(limit or 500), with_lines=True)
 
             if not sales:
                 return {"ok": True, "exported": 0, "message": "No hay ventas para exportar"}
@@ -109,20 +136,32 @@ class SincronizadorGoogleSheets:
         if not imp.get("ok"):
             return imp
 
-        exp = self.exportar_inventario()
+        # The inventory export writes back the merged DB, so it waits for the import; VENTAS
+        # is a different worksheet and only overlaps with that export.
+        with ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets-ventas") as pool:
+            ventas = pool.submit(self.exportar_ventas)
+            exp = self.exportar_inventario()
+            try:
+                sales = ventas.result()
+            except Exception as e:
+                logger.error("Error exportando ventas a Google Sheets: %s", e)
+                sales = {"ok": False, "error": str(e)}
+        sales_exported = sales.get("exported", 0) if isinstance(sales, dict) else 0
+
         if not exp.get("ok"):
             return {
                 "ok": False,
                 "error": exp.get("error") or "Error exportando inventario",
                 "imported": imp.get("imported", 0),
+                # VENTAS ran alongside the failed export and may already be written.
+                "sales_exported": sales_exported,
             }
 
-        sales = self.exportar_ventas()
         return {
             "ok": True,
             "imported": imp.get("imported", 0),
             "exported": exp.get("exported", 0),
-            "sales_exported": sales.get("exported", 0) if isinstance(sales, dict) else 0,
+            "sales_exported": sales_exported,
             "url": exp.get("url") or imp.get("url"),
             "source": "Google Sheets",
         }
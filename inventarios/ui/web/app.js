@@ -1687,7 +1687,7 @@ function createHttpBackend(baseUrl) {
 
     getSummary: (limit) => httpJson('GET', `/api/getSummary?limit=${encodeURIComponent(String(limit ?? 25))}`),
     getSaleDetails: (id) => httpJson('GET', `/api/getSaleDetails?id=${encodeURIComponent(String(id || 0))}`),
-    listCashCloses: (limit) => httpJson('GET', `/api/listCashCloses?limit=${encodeURIComponent(String(limit ?? 30))}`),
+    listCashCloses: (limit, beforeId) => httpJson('GET', `/api/listCashCloses?limit=${encodeURIComponent(String(limit ?? 30))}` + (beforeId ? `&before_id=${encodeURIComponent(String(beforeId))}` : '')),
     getCashPanel: (day) => httpJson('GET', `/api/getCashPanel?day=${encodeURIComponent(String(day || ''))}`),
 
     useSuggestedOpeningCash: (day) => httpJson('POST', '/api/useSuggestedOpeningCash', { day }),
@@ -6,8 +6,15 @@ from urllib.parse import quote
 
 from flask import Flask, Response, jsonify, redirect, request, send_from_directory
 
+# orjson is optional: it only speeds up encoding of the large product list.
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
 from inventarios.settings import Settings
 from inventarios.ui.webview_backend import WebviewBackend
+from inventarios.utils import safe_filename
 
 
 def _resolve_web_dir() -> Path:
@@ -79,6 +86,8 @@ def create_app(session_factory, settings: Settings) -> Flask:
                 except Exception:
                     pass
             out.append(rr)
+        if orjson is not None:
+            return Response(orjson.dumps(out), mimetype="application/json")
         return _ok(out)
 
     @app.get("/api/getCategories")
@@ -113,7 +122,8 @@ def create_app(session_factory, settings: Settings) -> Flask:
     @app.get("/api/listCashCloses")
     def api_list_cash_closes():
         limit = request.args.get("limit", "30")
-        return _ok(backend.listCashCloses(int(limit)))
+        before_id = request.args.get("before_id") or None
+        return _ok(backend.listCashCloses(int(limit), int(before_id) if before_id else None))
 
     @app.get("/api/getCashPanel")
     def api_get_cash_panel():
@@ -241,8 +251,7 @@ def create_app(session_factory, settings: Settings) -> Flask:
 
         # Save with the same naming strategy as desktop (safe filename) but keep ext.
         ext = Path(f.filename).suffix.lower() or ".png"
-        safe_key = "".join(ch if (ch.isalnum() or ch in "._-") else "_" for ch in key).strip("_.") or "img"
-        dst = images_dir / f"{safe_key}{ext}"
+        dst = images_dir / f"{safe_filename(key)}{ext}"
         try:
             f.save(dst)
         except Exception as e:
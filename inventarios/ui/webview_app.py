@@ -74,4 +74,7 @@ def run_app_webview(session_factory, settings: Settings) -> int:
         except Exception:
             pass
         raise
+    finally:
+        # Window closed: don't keep the process alive for queued Sheets exports.
+        backend._shutdown_background()
     return 0
@@ -1,27 +1,48 @@
 from __future__ import annotations
 
+import atexit
+import functools
 import logging
 import os
 import re
 import shutil
 import subprocess
 import sys
-from dataclasses import dataclass
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
 from datetime import datetime, timedelta
 from decimal import Decimal
 from pathlib import Path
 import threading
 
-from sqlalchemy import delete, update
+from sqlalchemy import Float, and_, cast, delete, func, insert, or_, select, update
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from inventarios.db import session_scope
 from inventarios.models import CashClose, CashDay, CashMove, Product, ProductImage, Sale, SaleLine
-from inventarios.repos import ProductRepo, SalesRepo
+from inventarios.repos import ProductRepo, SalesRepo, day_bounds
 from inventarios.services import PosService
 from inventarios.settings import Settings
+from inventarios.utils import safe_filename
 
 logger = logging.getLogger(__name__)
 
+# Numeric columns already come back as Decimal; quantize them directly instead of
+# round-tripping through str(). Decimal(str(...)) is kept only for webview input.
+_Q2 = Decimal("0.01")
+_ZERO = Decimal("0.00")
+
+# getCategories is polled on every UI refresh; categories change rarely.
+_CATEGORIES_TTL_SECONDS = 30.0
+
+_FMT_DAY = "%Y-%m-%d"
+
+
+def _fmt_ymdhm(dt: datetime) -> str:
+    """YYYY-MM-DD HH:MM with plain int formatting (no strftime/locale work per row)."""
+    return f"{dt.year:04d}-{dt.month:02d}-{dt.day:02d} {dt.hour:02d}:{dt.minute:02d}"
+
 
 @dataclass(frozen=True)
 class OkResult:
@@ -29,31 +50,108 @@ class OkResult:
     error: str | None = None
 
 
+@dataclass
+class _PendingWithdrawal:
+    day: str
+    amount: Decimal
+    notes: str | None
+    done: threading.Event = field(default_factory=threading.Event)
+    result: dict | None = None
+    error: BaseException | None = None
+
+
 def _file_url(path: str | None) -> str | None:
     if not path:
         return None
-    p = Path(path)
-    if not p.exists():
+    # One stat per call; the resolved URL is cached until the file's mtime changes.
+    try:
+        mtime_ns = os.stat(path).st_mtime_ns
+    except OSError:
         return None
+    return _file_url_cached(path, int(mtime_ns))
+
+
+@functools.lru_cache(maxsize=2048)
+def _file_url_cached(path: str, mtime_ns: int) -> str:
+    p = Path(path)
     try:
-        url = p.resolve().as_uri()
+        # pickProductImage/uploadProductImage store paths under the resolved images dir,
+        # so absolute paths skip the extra resolve() syscalls.
+        url = p.as_uri() if p.is_absolute() else p.resolve().as_uri()
     except Exception:
         # Fall back to best-effort file URL
         url = p.absolute().as_uri()
+    return f"{url}?v={mtime_ns}"
+
+
+# Existence probes for cash closes: EXISTS lets SQLite stop at the first index hit
+# and returns a bare bool instead of hydrating a Row.
+_ANY_CLOSE_STMT = select(select(CashClose.id).exists())
+
+
+def _any_close(session) -> bool:
+    return bool(session.execute(_ANY_CLOSE_STMT).scalar())
+
 
+def _day_closed(session, day: str) -> bool:
+    return bool(session.execute(select(select(CashClose.id).where(CashClose.day == day).exists())).scalar())
+
+
+_DAY_RE = re.compile(r"[0-9]{4}-[0-9]{2}-[0-9]{2}")
+
+
+def _parse_day(day_iso) -> str | None:
+    """Returns the stripped YYYY-MM-DD day, or None if it is not a valid date."""
+    day = str(day_iso or "").strip()
+    if not _DAY_RE.fullmatch(day):
+        return None
     try:
-        v = int(p.stat().st_mtime_ns)
-        return f"{url}?v={v}"
-    except Exception:
-        return url
+        datetime.strptime(day, _FMT_DAY)
+    except ValueError:
+        return None
+    return day
+
+
+@functools.lru_cache(maxsize=512)
+def _next_day(day: str) -> str:
+    d = datetime.strptime(day, _FMT_DAY)
+    return (d + timedelta(days=1)).strftime(_FMT_DAY)
 
 
-_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+_TK_ROOT = None
+_TK_LOCK = threading.Lock()
 
 
-def _safe_filename(name: str) -> str:
-    s = _SAFE_NAME_RE.sub("_", (name or "").strip())
-    return s.strip("_.") or "img"
+def _destroy_tk_root() -> None:
+    global _TK_ROOT
+    root, _TK_ROOT = _TK_ROOT, None
+    if root is not None:
+        try:
+            root.destroy()
+        except Exception:
+            pass
+
+
+def _get_tk_root():
+    # Creating a Tk() is slow (hundreds of ms on Windows), so one hidden root is created
+    # on first use and reused for every dialog until the process exits.
+    global _TK_ROOT
+    with _TK_LOCK:
+        if _TK_ROOT is None:
+            # Tkinter is in the stdlib on Windows python.org builds.
+            # We keep it isolated so importing this module doesn't pop a window.
+            import tkinter as tk
+
+            root = tk.Tk()
+            root.withdraw()
+            # Dialogs are parented to this root; keep them above the webview window.
+            try:
+                root.attributes("-topmost", True)
+            except Exception:
+                pass
+            _TK_ROOT = root
+            atexit.register(_destroy_tk_root)
+        return _TK_ROOT
 
 
 def _ask_open_filename(title: str, filetypes: list[tuple[str, str]]):
@@ -65,20 +163,30 @@ def _ask_open_filename(title: str, filetypes: list[tuple[str, str]]):
             "En modo servidor/tablet no se pueden abrir ventanas del sistema desde el servidor."
         )
 
-    # Tkinter is in the stdlib on Windows python.org builds.
-    # We keep it isolated so importing this module doesn't pop a window.
-    import tkinter as tk
     from tkinter import filedialog
 
-    root = tk.Tk()
-    root.withdraw()
-    try:
-        return filedialog.askopenfilename(title=title, initialdir=str(Path.cwd()), filetypes=filetypes)
-    finally:
+    root = _get_tk_root()
+    return filedialog.askopenfilename(
+        parent=root, title=title, initialdir=str(Path.cwd()), filetypes=filetypes
+    )
+
+
+def _copy_file(src: Path, dst: Path) -> None:
+    """shutil.copy2, but with the copy done by the OS on Windows.
+
+    On Python 3.11 shutil copies through a userspace buffer on Windows; CopyFileExW
+    copies in the kernel and keeps timestamps/attributes like copy2. Linux shutil
+    already uses sendfile, so it's used as is there (and as the fallback).
+    """
+    if os.name == "nt":
         try:
-            root.destroy()
+            import ctypes
+
+            if ctypes.windll.kernel32.CopyFileExW(str(src), str(dst), None, None, None, 0):
+                return
         except Exception:
             pass
+    shutil.copy2(src, dst)
 
 
 def _open_folder(path: Path) -> bool:
@@ -106,14 +214,88 @@ class WebviewBackend:
     def __init__(self, session_factory, settings: Settings):
         self._session_factory = session_factory
         self._settings = settings
-    
-    def _auto_export_to_sheets(self):
-        """Exporta automáticamente a Google Sheets en segundo plano."""
-        try:
+        # Auto-exports run on a single background worker so requests don't wait on the
+        # Sheets HTTP round-trip. SincronizadorGoogleSheets opens its own sessions.
+        self._bg = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sheets-export")
+        # Export kinds queued but not started yet: a burst of edits queues one full export
+        # per kind instead of one per edit (the queued run reads the latest DB anyway).
+        self._bg_pending: set[str] = set()
+        self._bg_lock = threading.Lock()
+        # Serializes every Sheets call (background and manual) so exports don't interleave.
+        self._sheets_lock = threading.Lock()
+        self._sheets_svc = None
+        # getCategories cache: (monotonic timestamp, categories). The generation counter
+        # keeps a query that raced with an invalidation from storing stale data.
+        self._cats_cache: tuple[float, list[str]] | None = None
+        self._cats_gen = 0
+        self._cats_lock = threading.Lock()
+        # getCashPanel cache: day -> (signature, panel). Same generation scheme as above;
+        # writes that the signature can't see (e.g. deleting an older move) bump it.
+        self._panel_cache: dict[str, tuple[tuple, dict]] = {}
+        self._panel_gen = 0
+        self._panel_lock = threading.Lock()
+        # Group commit for withdrawals: whoever finds no flush in progress becomes the
+        # leader and writes every queued entry in one transaction; entries arriving
+        # meanwhile wait and go out in the leader's next batch.
+        self._wd_pending: list[_PendingWithdrawal] = []
+        self._wd_flushing = False
+        self._wd_lock = threading.Lock()
+
+    def _sheets(self):
+        """Returns the shared SincronizadorGoogleSheets; callers must hold _sheets_lock."""
+        if self._sheets_svc is None:
             from inventarios.sincronizacion_google import SincronizadorGoogleSheets
 
-            svc = SincronizadorGoogleSheets(self._session_factory, self._settings)
-            res = svc.exportar_inventario()
+            self._sheets_svc = SincronizadorGoogleSheets(self._session_factory, self._settings)
+        return self._sheets_svc
+
+    def _queue_export(self, kind: str, fn) -> None:
+        with self._bg_lock:
+            if kind in self._bg_pending:
+                return
+            self._bg_pending.add(kind)
+
+        def run():
+            # Leaving the pending set before exporting: changes made while this run is in
+            # flight queue a new one.
+            with self._bg_lock:
+                self._bg_pending.discard(kind)
+            fn()
+
+        try:
+            self._bg.submit(run)
+        except RuntimeError:
+            # Executor already shut down (app closing): nothing to export to.
+            with self._bg_lock:
+                self._bg_pending.discard(kind)
+
+    def _shutdown_background(self) -> None:
+        """Drops queued exports so closing the app doesn't wait for them (each may retry
+        with backoff); only an export already running is allowed to finish.
+
+        Underscore-prefixed so pywebview doesn't expose it to JS through js_api."""
+        self._bg.shutdown(wait=False, cancel_futures=True)
+
+    def _auto_export_enabled(self) -> bool:
+        return bool(self._settings.GOOGLE_SHEETS_ENABLED and self._settings.GOOGLE_SHEETS_AUTO_EXPORT)
+
+    def _auto_export_to_sheets(self):
+        """Encola la exportación del inventario a Google Sheets en segundo plano."""
+        if not self._auto_export_enabled():
+            return
+        self._queue_export("inventory", self._do_export_inventory)
+
+    def _auto_export_sales_to_sheets(self):
+        """Encola la exportación de ventas a la hoja VENTAS en segundo plano."""
+        if not self._auto_export_enabled():
+            return
+        self._queue_export("sales", self._do_export_sales)
+
+    def _do_export_inventory(self):
+        try:
+            with self._sheets_lock:
+                svc = self._sheets()
+                res = svc.exportar_inventario()
             if res.get("ok"):
                 logger.info("✅ Auto-exportado inventario a Google Sheets")
             else:
@@ -121,13 +303,11 @@ class WebviewBackend:
         except Exception as e:
             logger.warning("⚠️  Error en auto-exportación: %s", e)
 
-    def _auto_export_sales_to_sheets(self):
-        """Exporta automáticamente las ventas a la hoja VENTAS en Google Sheets."""
+    def _do_export_sales(self):
         try:
-            from inventarios.sincronizacion_google import SincronizadorGoogleSheets
-
-            svc = SincronizadorGoogleSheets(self._session_factory, self._settings)
-            res = svc.exportar_ventas(limit=500)
+            with self._sheets_lock:
+                svc = self._sheets()
+                res = svc.exportar_ventas(limit=500)
             if res.get("ok") and int(res.get("exported") or 0) > 0:
                 logger.info("✅ Auto-exportadas %s ventas a Google Sheets", res.get("exported"))
         except Exception as e:
@@ -146,12 +326,8 @@ class WebviewBackend:
 
         with session_scope(self._session_factory) as session:
             repo = ProductRepo(session)
-            rows = repo.list(q=qn, limit=lim)
-            keys = [r.key for r in rows]
-            images = {
-                img.product_key: img.path
-                for img in session.query(ProductImage).filter(ProductImage.product_key.in_(keys)).all()
-            }
+            # One LEFT JOIN query with only the columns the UI needs (no ORM instances).
+            rows = repo.list_with_images(q=qn, limit=lim)
 
             out: list[dict] = []
             for r in rows:
@@ -163,15 +339,31 @@ class WebviewBackend:
                         "unidades": int(r.unidades),
                         "precio_final": float(r.precio_final),
                         "category": (r.category or ""),
-                        "image_url": _file_url(images.get(r.key)),
+                        "image_url": _file_url(r.image_path),
                     }
                 )
             return out
 
+    def _invalidate_categories(self) -> None:
+        with self._cats_lock:
+            self._cats_cache = None
+            self._cats_gen += 1
+
     def getCategories(self):
+        now = time.monotonic()
+        with self._cats_lock:
+            cached = self._cats_cache
+            gen = self._cats_gen
+        if cached is not None and now - cached[0] < _CATEGORIES_TTL_SECONDS:
+            return ["Todas"] + cached[1]
+
         with session_scope(self._session_factory) as session:
             repo = ProductRepo(session)
             cats = repo.list_categories()
+
+        with self._cats_lock:
+            if self._cats_gen == gen:
+                self._cats_cache = (now, cats)
         return ["Todas"] + cats
 
     def pickProductImage(self, product_key: str):
@@ -197,9 +389,9 @@ class WebviewBackend:
         img_dir.mkdir(parents=True, exist_ok=True)
 
         ext = src.suffix.lower() or ".png"
-        dst = img_dir / f"{_safe_filename(key)}{ext}"
+        dst = img_dir / f"{safe_filename(key)}{ext}"
         try:
-            shutil.copy2(src, dst)
+            _copy_file(src, dst)
         except Exception as e:
             return {"ok": False, "error": f"No se pudo copiar imagen: {e}"}
 
@@ -224,6 +416,7 @@ class WebviewBackend:
         with session_scope(self._session_factory) as session:
             repo = ProductRepo(session)
             ok = repo.set_category(key, category)
+        self._invalidate_categories()
         return {"ok": bool(ok)}
 
     def setProductInfo(self, key: str, producto: str, descripcion: str = ""):
@@ -298,6 +491,7 @@ class WebviewBackend:
                     category=category,
                 )
                 product_key = row.key
+            self._invalidate_categories()
             
             # Auto-exportar a Google Sheets (solo si se creó exitosamente)
             self._auto_export_to_sheets()
@@ -321,6 +515,7 @@ class WebviewBackend:
                 repo.delete_product(k)
             except Exception as e:
                 return {"ok": False, "error": str(e)}
+        self._invalidate_categories()
         
         # Auto-exportar a Google Sheets
         self._auto_export_to_sheets()
@@ -347,6 +542,7 @@ class WebviewBackend:
             with session_scope(self._session_factory) as session:
                 products = ProductRepo(session)
                 deleted = products.delete_duplicate_products(keep_first=keep_first)
+            self._invalidate_categories()
             return {"ok": True, "deleted": deleted}
         except Exception as e:
             return {"ok": False, "error": str(e)}
@@ -381,33 +577,64 @@ class WebviewBackend:
             if not res.ok:
                 return {"ok": False, "error": res.error or "Error", "details": res.details or None}
 
-            # Exportar ventas a Google Sheets después de cada venta
-            self._auto_export_sales_to_sheets()
-
-            return {
-                "ok": True,
-                "sale_id": int(res.sale_id or 0),
-                "total": float(res.total or 0),
-                "payment_method": res.payment_method or payment_method,
-                "cash_received": float(res.cash_received) if res.cash_received is not None else None,
-                "change_given": float(res.change_given) if res.change_given is not None else None,
-            }
-
-    def _ensure_cash_day(self, session, day: str) -> CashDay:
-        row = session.get(CashDay, day)
-        if row is None:
-            row = CashDay(day=day, opening_cash=Decimal("0.00"), opening_cash_manual=0)
-            session.add(row)
+        # Exportar ventas a Google Sheets después de cada venta (ya confirmada en la DB)
+        self._auto_export_sales_to_sheets()
+
+        return {
+            "ok": True,
+            "sale_id": int(res.sale_id or 0),
+            "total": float(res.total or 0),
+            "payment_method": res.payment_method or payment_method,
+            "cash_received": float(res.cash_received) if res.cash_received is not None else None,
+            "change_given": float(res.change_given) if res.change_given is not None else None,
+        }
+
+    def _ensure_cash_day(self, session, day: str) -> None:
+        """Creates the CashDay row for `day` (opening 0, not manual) if it doesn't exist."""
+        bind = session.get_bind()
+        if bind is not None and getattr(bind.dialect, "name", "") == "sqlite":
+            stmt = sqlite_insert(CashDay).values(day=day, opening_cash=_ZERO, opening_cash_manual=0)
+            session.execute(stmt.on_conflict_do_nothing(index_elements=[CashDay.day]))
+            return
+
+        # Generic fallback (non-sqlite)
+        if session.get(CashDay, day) is None:
+            session.add(CashDay(day=day, opening_cash=_ZERO, opening_cash_manual=0))
             session.flush()
-        return row
 
-    def _get_prev_close(self, session, day: str) -> CashClose | None:
-        return (
-            session.query(CashClose)
-            .filter(CashClose.day < day)
+    def _set_cash_day_opening(self, session, day: str, opening_cash: Decimal, *, manual: bool) -> None:
+        """Creates or updates the CashDay row for `day` with the given opening cash."""
+        now = datetime.utcnow()
+        values = {"opening_cash": opening_cash, "opening_cash_manual": 1 if manual else 0, "updated_at": now}
+
+        # Fast path for SQLite: one INSERT ... ON CONFLICT DO UPDATE instead of get + flush.
+        bind = session.get_bind()
+        if bind is not None and getattr(bind.dialect, "name", "") == "sqlite":
+            stmt = sqlite_insert(CashDay).values(day=day, **values)
+            stmt = stmt.on_conflict_do_update(index_elements=[CashDay.day], set_=values)
+            session.execute(stmt)
+            return
+
+        # Generic fallback (non-sqlite): Core UPDATE, INSERT only when no row matched.
+        res = session.execute(update(CashDay).where(CashDay.day == day).values(**values))
+        if not res.rowcount:
+            session.execute(insert(CashDay).values(day=day, **values))
+
+    def _get_prev_close(self, session, day: str) -> tuple[Decimal | None, bool]:
+        """(carry_to_next_day of the latest close before `day`, whether any close exists).
+
+        Both come from one round-trip; the EXISTS is only consulted when there is no
+        previous close, but fetching it here saves a second query in that branch.
+        """
+        prev_carry = (
+            select(CashClose.carry_to_next_day)
+            .where(CashClose.day < day)
             .order_by(CashClose.day.desc(), CashClose.created_at.desc())
-            .first()
+            .limit(1)
+            .scalar_subquery()
         )
+        row = session.execute(select(prev_carry, select(CashClose.id).exists())).one()
+        return row[0], bool(row[1])
 
     def _get_opening_cash(self, session, day: str) -> tuple[Decimal, str, bool]:
         """Returns (opening_cash, source, needs_initial_opening).
@@ -417,164 +644,245 @@ class WebviewBackend:
           - "initial": one-time initial cash set by user
           - "zero": default 0 when system has no prior data
         """
-        day_row = self._ensure_cash_day(session, day)
-        prev = self._get_prev_close(session, day)
-        if prev is not None:
-            opening = Decimal(str(prev.carry_to_next_day or 0)).quantize(Decimal("0.01"))
+        day_row = session.execute(
+            select(CashDay.opening_cash, CashDay.opening_cash_manual).where(CashDay.day == day)
+        ).one_or_none()
+        prev_carry, any_close = self._get_prev_close(session, day)
+        if prev_carry is not None:
+            opening = prev_carry.quantize(_Q2)
             # Enforce rule: opening is derived from previous close.
-            try:
-                if Decimal(str(day_row.opening_cash or 0)).quantize(Decimal("0.01")) != opening or int(
-                    getattr(day_row, "opening_cash_manual", 0) or 0
-                ) != 0:
-                    day_row.opening_cash = opening
-                    day_row.opening_cash_manual = 0
-                    day_row.updated_at = datetime.utcnow()
-            except Exception:
-                pass
+            if (
+                day_row is None
+                or (day_row.opening_cash or _ZERO).quantize(_Q2) != opening
+                or int(day_row.opening_cash_manual or 0) != 0
+            ):
+                self._set_cash_day_opening(session, day, opening, manual=False)
             return opening, "prev_close", False
 
+        if day_row is None:
+            self._ensure_cash_day(session, day)
+            return _ZERO, "zero", not any_close
+
         # No previous close: allow one-time initial opening.
-        opening = Decimal(str(day_row.opening_cash or 0)).quantize(Decimal("0.01"))
-        is_initial = int(getattr(day_row, "opening_cash_manual", 0) or 0) == 1
+        opening = (day_row.opening_cash or _ZERO).quantize(_Q2)
+        is_initial = int(day_row.opening_cash_manual or 0) == 1
         if is_initial:
             return opening, "initial", False
         # No initial set.
-        any_close = session.query(CashClose.id).limit(1).first() is not None
         # If there are closes but none before this day, treat as prev_close scenario in past dates.
         # For simplicity: still requires opening unless user closes days in order.
-        return Decimal("0.00"), "zero", not any_close
-
-    def _next_day(self, day: str) -> str:
-        d = datetime.strptime(day, "%Y-%m-%d")
-        return (d + timedelta(days=1)).strftime("%Y-%m-%d")
+        return _ZERO, "zero", not any_close
+
+    def _invalidate_cash_panel(self) -> None:
+        with self._panel_lock:
+            self._panel_cache.clear()
+            self._panel_gen += 1
+
+    def _cash_panel_signature(self, session, day: str) -> tuple:
+        """Cheap fingerprint of everything the panel reads: new sales, moves and closes
+        bump their max id, and opening changes bump the day's updated_at. The day's
+        withdrawal count/sum catch deletions of older moves, including ones made by the
+        other process sharing the DB (desktop app vs. tablet server), where
+        _invalidate_cash_panel never runs."""
+        withdrawals = (CashMove.day == day) & (CashMove.kind == "withdrawal")
+        return tuple(
+            session.execute(
+                select(
+                    select(func.max(Sale.id)).scalar_subquery(),
+                    select(func.max(CashMove.id)).scalar_subquery(),
+                    select(func.max(CashClose.id)).scalar_subquery(),
+                    select(CashDay.updated_at).where(CashDay.day == day).scalar_subquery(),
+                    select(func.count()).select_from(CashMove).where(withdrawals).scalar_subquery(),
+                    select(func.sum(CashMove.amount)).where(withdrawals).scalar_subquery(),
+                )
+            ).one()
+        )
 
     def getCashPanel(self, day_iso: str):
-        day = (day_iso or "").strip()
+        day = _parse_day(day_iso)
         if not day:
             return {"ok": False, "error": "Día inválido"}
 
-        with session_scope(self._session_factory) as session:
-            day_row = self._ensure_cash_day(session, day)
-            opening_cash, opening_source, needs_initial_opening = self._get_opening_cash(session, day)
-
-            sales = SalesRepo(session)
-            t = sales.totals_for_day(day)
-
-            moves = (
-                session.query(CashMove)
-                .filter((CashMove.day == day) & (CashMove.kind == "withdrawal"))
-                .order_by(CashMove.created_at.desc())
-                .limit(50)
-                .all()
-            )
-            withdrawals_total = sum((Decimal(str(m.amount or 0)) for m in moves), Decimal("0.00")).quantize(
-                Decimal("0.01")
-            )
+        with self._panel_lock:
+            cached = self._panel_cache.get(day)
+            gen = self._panel_gen
 
-            expected_cash_end = (opening_cash + Decimal(str(t["cash_total"] or 0)) - withdrawals_total).quantize(
-                Decimal("0.01")
+        with session_scope(self._session_factory) as session:
+            sig = self._cash_panel_signature(session, day)
+            if cached is not None and cached[0] == sig:
+                return cached[1]
+            out = self._build_cash_panel(session, day)
+            # Building the panel may have created or corrected the CashDay row.
+            sig = self._cash_panel_signature(session, day)
+
+        with self._panel_lock:
+            if self._panel_gen == gen:
+                self._panel_cache[day] = (sig, out)
+        return out
+
+    def _build_cash_panel(self, session, day: str) -> dict:
+        opening_cash, opening_source, needs_initial_opening = self._get_opening_cash(session, day)
+
+        t = SalesRepo(session).panel_totals_for_day(day)
+        withdrawals_total = t["withdrawals_total"]
+
+        moves = session.execute(
+            select(
+                CashMove.id,
+                CashMove.created_at,
+                cast(CashMove.amount, Float).label("amount"),
+                CashMove.notes,
             )
-
-            last_close = session.query(CashClose).filter(CashClose.day == day).order_by(CashClose.created_at.desc()).first()
-            is_closed = last_close is not None
-
-            out_moves = []
-            for m in moves:
-                out_moves.append(
-                    {
-                        "id": int(m.id),
-                        "created_at": m.created_at.strftime("%H:%M"),
-                        "amount": float(Decimal(str(m.amount or 0)).quantize(Decimal("0.01"))),
-                        "notes": m.notes or "",
-                    }
-                )
-
-            out_close = None
-            if last_close is not None:
-                out_close = {
-                    "created_at": last_close.created_at.strftime("%Y-%m-%d %H:%M"),
-                    "carry_to_next_day": float(Decimal(str(last_close.carry_to_next_day or 0)).quantize(Decimal("0.01"))),
-                    "cash_counted": float(last_close.cash_counted) if last_close.cash_counted is not None else None,
-                    "cash_diff": float(last_close.cash_diff) if last_close.cash_diff is not None else None,
+            .where((CashMove.day == day) & (CashMove.kind == "withdrawal"))
+            .order_by(CashMove.created_at.desc())
+            .limit(50)
+        ).all()
+
+        expected_cash_end = (opening_cash + t["cash_total"] - withdrawals_total).quantize(_Q2)
+
+        last_close = t["last_close"]
+        is_closed = last_close is not None
+
+        out_moves = []
+        for m in moves:
+            out_moves.append(
+                {
+                    "id": int(m.id),
+                    "created_at": f"{m.created_at.hour:02d}:{m.created_at.minute:02d}",
+                    "amount": m.amount,
+                    "notes": m.notes or "",
                 }
+            )
 
-            return {
-                "ok": True,
-                "day": day,
-                "opening_cash": float(opening_cash),
-                "opening_source": opening_source,
-                "needs_initial_opening": bool(needs_initial_opening),
-                "is_closed": bool(is_closed),
-                "withdrawals_total": float(withdrawals_total),
-                "withdrawals": out_moves,
-                "gross_total": float(t["gross_total"]),
-                "cash_total": float(t["cash_total"]),
-                "card_total": float(t["card_total"]),
-                "nequi_total": float(t.get("nequi_total", 0)),
-                "virtual_total": float(t.get("virtual_total", 0)),
-                "sales_count": int(t["sales_count"]),
-                "expected_cash_end": float(expected_cash_end),
-                "last_close": out_close,
+        out_close = None
+        if last_close is not None:
+            out_close = {
+                "created_at": _fmt_ymdhm(last_close["created_at"]),
+                "carry_to_next_day": float((last_close["carry_to_next_day"] or _ZERO).quantize(_Q2)),
+                "cash_counted": float(last_close["cash_counted"]) if last_close["cash_counted"] is not None else None,
+                "cash_diff": float(last_close["cash_diff"]) if last_close["cash_diff"] is not None else None,
             }
 
+        return {
+            "ok": True,
+            "day": day,
+            "opening_cash": float(opening_cash),
+            "opening_source": opening_source,
+            "needs_initial_opening": bool(needs_initial_opening),
+            "is_closed": bool(is_closed),
+            "withdrawals_total": float(withdrawals_total),
+            "withdrawals": out_moves,
+            "gross_total": float(t["gross_total"]),
+            "cash_total": float(t["cash_total"]),
+            "card_total": float(t["card_total"]),
+            "nequi_total": float(t["nequi_total"]),
+            "virtual_total": float(t["virtual_total"]),
+            "sales_count": t["sales_count"],
+            "expected_cash_end": float(expected_cash_end),
+            "last_close": out_close,
+        }
+
     def setOpeningCash(self, day_iso: str, opening_cash):
-        day = (day_iso or "").strip()
+        day = _parse_day(day_iso)
         if not day:
             return {"ok": False, "error": "Día inválido"}
 
         try:
-            v = Decimal(str(opening_cash)).quantize(Decimal("0.01"))
+            v = Decimal(str(opening_cash)).quantize(_Q2)
         except Exception:
             return {"ok": False, "error": "Valor inválido"}
 
         with session_scope(self._session_factory) as session:
             # Only allowed as the one-time initial opening when there are no prior closes.
-            any_close = session.query(CashClose.id).limit(1).first() is not None
-            if any_close:
+            if _any_close(session):
                 return {"ok": False, "error": "La apertura se arrastra del cierre anterior. No se ingresa manual cada día."}
 
-            row = self._ensure_cash_day(session, day)
-            row.opening_cash = v
-            row.opening_cash_manual = 1
-            row.updated_at = datetime.utcnow()
+            self._set_cash_day_opening(session, day, v, manual=True)
         return {"ok": True, "opening_cash": float(v)}
 
     def useSuggestedOpeningCash(self, day_iso: str):
-        day = (day_iso or "").strip()
+        day = _parse_day(day_iso)
         if not day:
             return {"ok": False, "error": "Día inválido"}
 
         # Deprecated in the new flow; keep endpoint for compatibility.
         with session_scope(self._session_factory) as session:
-            any_close = session.query(CashClose.id).limit(1).first() is not None
-            if any_close:
+            if _any_close(session):
                 return {"ok": False, "error": "Ya no aplica: la apertura se toma automáticamente del cierre anterior."}
-            row = self._ensure_cash_day(session, day)
-            row.opening_cash = Decimal("0.00")
-            row.opening_cash_manual = 0
-            row.updated_at = datetime.utcnow()
-            return {"ok": True, "opening_cash": float(row.opening_cash)}
+            self._set_cash_day_opening(session, day, _ZERO, manual=False)
+            return {"ok": True, "opening_cash": float(_ZERO)}
 
     def addCashWithdrawal(self, day_iso: str, amount, notes: str = ""):
-        day = (day_iso or "").strip()
+        day = _parse_day(day_iso)
         if not day:
             return {"ok": False, "error": "Día inválido"}
 
         try:
-            v = Decimal(str(amount)).quantize(Decimal("0.01"))
+            v = Decimal(str(amount)).quantize(_Q2)
         except Exception:
             return {"ok": False, "error": "Monto inválido"}
         if v <= 0:
             return {"ok": False, "error": "El retiro debe ser mayor a 0"}
 
-        with session_scope(self._session_factory) as session:
-            if session.query(CashClose.id).filter(CashClose.day == day).limit(1).first() is not None:
-                return {"ok": False, "error": "El día ya está cerrado. No se pueden agregar retiros."}
-            self._ensure_cash_day(session, day)
-            mv = CashMove(day=day, kind="withdrawal", amount=v, notes=(notes or "") or None)
-            session.add(mv)
-            session.flush()
-            return {"ok": True, "id": int(mv.id)}
+        item = _PendingWithdrawal(day=day, amount=v, notes=(notes or "") or None)
+        with self._wd_lock:
+            self._wd_pending.append(item)
+            leader = not self._wd_flushing
+            self._wd_flushing = True
+
+        if leader:
+            while True:
+                with self._wd_lock:
+                    batch, self._wd_pending = self._wd_pending, []
+                    if not batch:
+                        self._wd_flushing = False
+                        break
+                self._flush_withdrawals(batch)
+
+        item.done.wait()
+        if item.error is not None:
+            raise item.error
+        return item.result
+
+    def _flush_withdrawals(self, batch: list[_PendingWithdrawal]) -> None:
+        """Inserts a batch of queued withdrawals in a single transaction (one commit)."""
+        try:
+            with session_scope(self._session_factory) as session:
+                days = {it.day for it in batch}
+                closed = set(
+                    session.execute(select(CashClose.day).where(CashClose.day.in_(days)).distinct()).scalars()
+                )
+                accepted = []
+                for it in batch:
+                    if it.day in closed:
+                        it.result = {"ok": False, "error": "El día ya está cerrado. No se pueden agregar retiros."}
+                    else:
+                        accepted.append(it)
+                for day in days - closed:
+                    self._ensure_cash_day(session, day)
+
+                rows = [
+                    {"day": it.day, "kind": "withdrawal", "amount": it.amount, "notes": it.notes}
+                    for it in accepted
+                ]
+                if rows and session.get_bind().dialect.insert_executemany_returning_sort_by_parameter_order:
+                    # executemany + RETURNING, ids in parameter order.
+                    ids = session.execute(
+                        insert(CashMove).returning(CashMove.id, sort_by_parameter_order=True), rows
+                    ).scalars().all()
+                else:
+                    # RETURNING needs SQLite 3.35+; older bundled builds get one INSERT per row
+                    # with the id from lastrowid (still a single transaction/commit).
+                    ids = [session.execute(insert(CashMove).values(**row)).inserted_primary_key[0] for row in rows]
+                for it, mid in zip(accepted, ids):
+                    it.result = {"ok": True, "id": int(mid)}
+        except BaseException as e:
+            for it in batch:
+                it.result = None
+                it.error = e
+        finally:
+            for it in batch:
+                it.done.set()
 
     def deleteCashMove(self, move_id: int):
         mid = int(move_id or 0)
@@ -585,42 +893,37 @@ class WebviewBackend:
             if mv is None:
                 return {"ok": False, "error": "No existe"}
             session.delete(mv)
+        # Deleting an older move leaves max(CashMove.id) unchanged; drop the panel cache.
+        self._invalidate_cash_panel()
         return {"ok": True}
 
     def closeCashDay(self, day_iso: str, cash_counted, carry_to_next_day, notes: str = "", force: bool = False):
-        day = (day_iso or "").strip()
+        day = _parse_day(day_iso)
         if not day:
             return {"ok": False, "error": "Día inválido"}
 
         cash_counted_d: Decimal | None = None
         try:
             if cash_counted is not None and str(cash_counted).strip() != "":
-                cash_counted_d = Decimal(str(cash_counted)).quantize(Decimal("0.01"))
+                cash_counted_d = Decimal(str(cash_counted)).quantize(_Q2)
         except Exception:
             return {"ok": False, "error": "Valores inválidos"}
 
         with session_scope(self._session_factory) as session:
             # Idempotency: don't allow closing the same day twice.
-            if session.query(CashClose.id).filter(CashClose.day == day).limit(1).first() is not None:
+            if _day_closed(session, day):
                 return {"ok": False, "error": "La caja de este día ya fue cerrada."}
 
-            self._ensure_cash_day(session, day)
             opening_cash, _, _ = self._get_opening_cash(session, day)
-            sales = SalesRepo(session)
-            t = sales.totals_for_day(day)
+            # Same figures the cash panel shows.
+            t = SalesRepo(session).panel_totals_for_day(day)
+            withdrawals_total = t["withdrawals_total"]
 
-            moves = session.query(CashMove).filter((CashMove.day == day) & (CashMove.kind == "withdrawal")).all()
-            withdrawals_total = sum((Decimal(str(m.amount or 0)) for m in moves), Decimal("0.00")).quantize(
-                Decimal("0.01")
-            )
-
-            expected_cash_end = (opening_cash + Decimal(str(t["cash_total"] or 0)) - withdrawals_total).quantize(
-                Decimal("0.01")
-            )
+            expected_cash_end = (opening_cash + (t["cash_total"] or _ZERO) - withdrawals_total).quantize(_Q2)
 
             diff: Decimal | None = None
             if cash_counted_d is not None:
-                diff = (cash_counted_d - expected_cash_end).quantize(Decimal("0.01"))
+                diff = (cash_counted_d - expected_cash_end).quantize(_Q2)
                 if diff != 0 and not bool(force):
                     return {
                         "ok": False,
@@ -640,8 +943,8 @@ class WebviewBackend:
                 gross_total=t["gross_total"],
                 cash_total=t["cash_total"],
                 card_total=t["card_total"],
-                nequi_total=t.get("nequi_total", Decimal("0.00")),
-                virtual_total=t.get("virtual_total", Decimal("0.00")),
+                nequi_total=t.get("nequi_total", _ZERO),
+                virtual_total=t.get("virtual_total", _ZERO),
                 expected_cash_end=expected_cash_end,
                 carry_to_next_day=carry_d,
                 cash_counted=cash_counted_d,
@@ -653,11 +956,7 @@ class WebviewBackend:
 
             # Persist next day's opening for UI convenience.
             try:
-                next_day = self._next_day(day)
-                next_row = self._ensure_cash_day(session, next_day)
-                next_row.opening_cash = carry_d
-                next_row.opening_cash_manual = 0
-                next_row.updated_at = datetime.utcnow()
+                self._set_cash_day_opening(session, _next_day(day), carry_d, manual=False)
             except Exception:
                 pass
 
@@ -665,14 +964,10 @@ class WebviewBackend:
             if cash_counted_d is not None and (diff is None or diff == 0):
                 msg = "Todo cuadra. Mucha chamba por hoy, hora de dormir."
 
-            # Auto-exportar a Google Sheets al cerrar caja
-            self._auto_export_to_sheets()
-            self._auto_export_sales_to_sheets()
-
-            return {
+            out = {
                 "ok": True,
                 "id": int(row.id),
-                "created_at": row.created_at.strftime("%Y-%m-%d %H:%M"),
+                "created_at": _fmt_ymdhm(row.created_at),
                 "day": row.day,
                 "expected_cash_end": float(row.expected_cash_end),
                 "carry_to_next_day": float(row.carry_to_next_day),
@@ -680,29 +975,74 @@ class WebviewBackend:
                 "message": msg,
             }
 
-    def listCashCloses(self, limit: int = 30):
+        # Auto-exportar a Google Sheets al cerrar caja (después del commit)
+        self._auto_export_to_sheets()
+        self._auto_export_sales_to_sheets()
+
+        return out
+
+    def listCashCloses(self, limit: int = 30, before_id: int | None = None):
         lim = max(1, min(int(limit or 30), 200))
+        # Core select of just the columns the UI needs: no CashClose instances are built.
+        # Display-only endpoint, so money columns are CAST to REAL and arrive as floats.
+        stmt = (
+            select(
+                CashClose.id,
+                CashClose.created_at,
+                CashClose.day,
+                *(
+                    cast(col, Float).label(col.key)
+                    for col in (
+                        CashClose.opening_cash,
+                        CashClose.withdrawals_total,
+                        CashClose.gross_total,
+                        CashClose.cash_total,
+                        CashClose.card_total,
+                        CashClose.nequi_total,
+                        CashClose.virtual_total,
+                        CashClose.expected_cash_end,
+                        CashClose.carry_to_next_day,
+                        CashClose.cash_counted,
+                        CashClose.cash_diff,
+                    )
+                ),
+            )
+            .order_by(CashClose.created_at.desc(), CashClose.id.desc())
+            .limit(lim)
+            # Stream rows in chunks while building the list instead of buffering them all.
+            .execution_options(yield_per=100)
+        )
+        # Keyset pagination: the next page starts after the last row the UI received. The
+        # cursor follows the sort (created_at, id), so rows whose ids and timestamps
+        # disagree are neither skipped nor repeated.
+        if before_id:
+            bid = int(before_id)
+            before_at = select(CashClose.created_at).where(CashClose.id == bid).scalar_subquery()
+            stmt = stmt.where(
+                or_(
+                    CashClose.created_at < before_at,
+                    and_(CashClose.created_at == before_at, CashClose.id < bid),
+                )
+            )
         with session_scope(self._session_factory) as session:
-            rows = session.query(CashClose).order_by(CashClose.created_at.desc()).limit(lim).all()
-
             out: list[dict] = []
-            for r in rows:
+            for r in session.execute(stmt).mappings():
                 out.append(
                     {
-                        "id": int(r.id),
-                        "created_at": r.created_at.strftime("%Y-%m-%d %H:%M"),
-                        "day": r.day,
-                        "opening_cash": float(r.opening_cash) if r.opening_cash is not None else 0,
-                        "withdrawals_total": float(r.withdrawals_total) if r.withdrawals_total is not None else 0,
-                        "gross_total": float(r.gross_total),
-                        "cash_total": float(r.cash_total),
-                        "card_total": float(r.card_total),
-                        "nequi_total": float(getattr(r, "nequi_total", 0) or 0),
-                        "virtual_total": float(getattr(r, "virtual_total", 0) or 0),
-                        "expected_cash_end": float(getattr(r, "expected_cash_end", 0) or 0),
-                        "carry_to_next_day": float(getattr(r, "carry_to_next_day", 0) or 0),
-                        "cash_counted": float(r.cash_counted) if r.cash_counted is not None else None,
-                        "cash_diff": float(r.cash_diff) if r.cash_diff is not None else None,
+                        "id": int(r["id"]),
+                        "created_at": _fmt_ymdhm(r["created_at"]),
+                        "day": r["day"],
+                        "opening_cash": r["opening_cash"],
+                        "withdrawals_total": r["withdrawals_total"],
+                        "gross_total": r["gross_total"],
+                        "cash_total": r["cash_total"],
+                        "card_total": r["card_total"],
+                        "nequi_total": r["nequi_total"],
+                        "virtual_total": r["virtual_total"],
+                        "expected_cash_end": r["expected_cash_end"],
+                        "carry_to_next_day": r["carry_to_next_day"],
+                        "cash_counted": r["cash_counted"],
+                        "cash_diff": r["cash_diff"],
                     }
                 )
             return out
@@ -719,7 +1059,7 @@ class WebviewBackend:
             for row in last:
                 created = row.get("created_at")
                 if isinstance(created, datetime):
-                    created_str = created.strftime("%Y-%m-%d %H:%M")
+                    created_str = _fmt_ymdhm(created)
                 else:
                     created_str = str(created)
                 out_last.append(
@@ -754,35 +1094,30 @@ class WebviewBackend:
             return {"ok": False, "error": "Venta inválida"}
 
         with session_scope(self._session_factory) as session:
-            sale = session.get(Sale, sid)
-            if sale is None:
+            header, lines = SalesRepo(session).get_details(sid)
+            if header is None:
                 return {"ok": False, "error": "Venta no encontrada"}
 
-            lines = session.query(SaleLine).filter(SaleLine.sale_id == sid).order_by(SaleLine.id.asc()).all()
-            out_lines: list[dict] = []
-            items = 0
-            for ln in lines:
-                qty = int(getattr(ln, "qty", 0) or 0)
-                items += qty
-                out_lines.append(
-                    {
-                        "product_key": ln.product_key,
-                        "producto": ln.producto,
-                        "descripcion": ln.descripcion,
-                        "qty": qty,
-                        "unit_price": float(ln.unit_price or 0),
-                        "line_total": float(ln.line_total or 0),
-                    }
-                )
+            out_lines: list[dict] = [
+                {
+                    "product_key": ln.product_key,
+                    "producto": ln.producto,
+                    "descripcion": ln.descripcion,
+                    "qty": int(ln.qty or 0),
+                    "unit_price": float(ln.unit_price or 0),
+                    "line_total": float(ln.line_total or 0),
+                }
+                for ln in lines
+            ]
 
             return {
                 "ok": True,
                 "sale": {
-                    "id": int(sale.id),
-                    "created_at": sale.created_at.strftime("%Y-%m-%d %H:%M"),
-                    "total": float(sale.total or 0),
-                    "payment_method": str(sale.payment_method or "cash"),
-                    "items": int(items),
+                    "id": sid,
+                    "created_at": _fmt_ymdhm(header.created_at),
+                    "total": float(header.total or 0),
+                    "payment_method": str(header.payment_method or "cash"),
+                    "items": int(header.items or 0),
                     "lines": out_lines,
                 },
             }
@@ -790,10 +1125,13 @@ class WebviewBackend:
     def importGoogleSheets(self):
         """Importa inventario desde Google Sheets y actualiza la base de datos."""
         try:
-            from inventarios.sincronizacion_google import SincronizadorGoogleSheets
-
-            svc = SincronizadorGoogleSheets(self._session_factory, self._settings)
-            return svc.importar_inventario()
+            with self._sheets_lock:
+                svc = self._sheets()
+                try:
+                    return svc.importar_inventario()
+                finally:
+                    # The import may add products with new categories.
+                    self._invalidate_categories()
         except Exception as e:
             logger.error("Error importando desde Google Sheets: %s", e)
             return {"ok": False, "error": str(e)}
@@ -801,10 +1139,9 @@ class WebviewBackend:
     def exportGoogleSheets(self):
         """Exporta el inventario local a Google Sheets."""
         try:
-            from inventarios.sincronizacion_google import SincronizadorGoogleSheets
-
-            svc = SincronizadorGoogleSheets(self._session_factory, self._settings)
-            return svc.exportar_inventario()
+            with self._sheets_lock:
+                svc = self._sheets()
+                return svc.exportar_inventario()
         except Exception as e:
             logger.error("Error exportando a Google Sheets: %s", e)
             return {"ok": False, "error": str(e)}
@@ -812,10 +1149,13 @@ class WebviewBackend:
     def syncGoogleSheets(self):
         """Sincroniza (import + export + ventas) con Google Sheets."""
         try:
-            from inventarios.sincronizacion_google import SincronizadorGoogleSheets
-
-            svc = SincronizadorGoogleSheets(self._session_factory, self._settings)
-            return svc.sincronizar_todo()
+            with self._sheets_lock:
+                svc = self._sheets()
+                try:
+                    return svc.sincronizar_todo()
+                finally:
+                    # The import may add products with new categories.
+                    self._invalidate_categories()
         except Exception as e:
             logger.error("Error sincronizando Google Sheets: %s", e)
             return {"ok": False, "error": str(e)}
@@ -823,10 +1163,9 @@ class WebviewBackend:
     def exportSalesToSheets(self):
         """Exporta ventas a la hoja VENTAS en Google Sheets."""
         try:
-            from inventarios.sincronizacion_google import SincronizadorGoogleSheets
-
-            svc = SincronizadorGoogleSheets(self._session_factory, self._settings)
-            return svc.exportar_ventas(limit=500)
+            with self._sheets_lock:
+                svc = self._sheets()
+                return svc.exportar_ventas(limit=500)
         except Exception as e:
             logger.error("Error exportando ventas: %s", e)
             return {"ok": False, "error": str(e)}
@@ -835,17 +1174,41 @@ class WebviewBackend:
         if (confirm_text or "").strip().upper() != "BORRAR":
             return {"ok": False, "error": "Confirmación inválida (escribe BORRAR)"}
 
+        tables = [SaleLine.__table__, Sale.__table__, CashMove.__table__, CashClose.__table__, CashDay.__table__]
+        reset_stock = update(Product).values(unidades=0, updated_at=datetime.utcnow())
         try:
+            # Core statements on a plain Connection: nothing is loaded into an identity map.
+            # The session only resolves the engine; it never checks out a connection.
             with session_scope(self._session_factory) as session:
-                session.execute(delete(SaleLine))
-                session.execute(delete(Sale))
-
-                session.execute(delete(CashMove))
-                session.execute(delete(CashClose))
-                session.execute(delete(CashDay))
-
-                session.execute(update(Product).values(unidades=0, updated_at=datetime.utcnow()))
-
+                engine = session.get_bind()
+            dialect = engine.dialect.name
+            with engine.connect() as conn:
+                if dialect == "postgresql":
+                    names = ", ".join(t.name for t in tables)
+                    conn.exec_driver_sql(f"TRUNCATE {names} RESTART IDENTITY")
+                    conn.execute(reset_stock)
+                    conn.commit()
+                    self._invalidate_cash_panel()
+                    return {"ok": True}
+
+                # SQLite: with FK checks off, DELETE without WHERE can use the truncate
+                # optimization instead of probing child tables row by row. The pragma is
+                # ignored inside a transaction, so it is set before the first DML and
+                # restored after commit/rollback.
+                sqlite = dialect == "sqlite"
+                if sqlite:
+                    conn.exec_driver_sql("PRAGMA foreign_keys=OFF;")
+                try:
+                    for t in tables:
+                        conn.execute(delete(t))
+                    conn.execute(reset_stock)
+                    conn.commit()
+                finally:
+                    if sqlite:
+                        conn.rollback()
+                        conn.exec_driver_sql("PRAGMA foreign_keys=ON;")
+
+            self._invalidate_cash_panel()
             return {"ok": True}
         except Exception as e:
             return {"ok": False, "error": str(e)}
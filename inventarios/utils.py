@@ -0,0 +1,21 @@
+from __future__ import annotations
+
+import re
+import string
+
+
+_SAFE_NAME_RE = re.compile(r"[^A-Za-z0-9_.-]+")
+_SAFE_NAME_CHARS = frozenset(string.ascii_letters + string.digits + "_.-")
+# ASCII fast path: disallowed chars become spaces so split()/join collapses each run
+# into a single "_", exactly like _SAFE_NAME_RE.sub.
+_SAFE_NAME_TABLE = str.maketrans({chr(c): " " for c in range(128) if chr(c) not in _SAFE_NAME_CHARS})
+
+
+def safe_filename(name: str) -> str:
+    """Filename stem for a product key: runs of chars outside [A-Za-z0-9_.-] become "_"."""
+    s = (name or "").strip()
+    if s.isascii():
+        s = "_".join(s.translate(_SAFE_NAME_TABLE).split())
+    else:
+        s = _SAFE_NAME_RE.sub("_", s)
+    return s.strip("_.") or "img"
@@ -1,15 +1,27 @@
 from __future__ import annotations
 
 import argparse
+import errno
+import os
 import socket
 import sys
 import threading
+from typing import Callable
 
-from inventarios.db import create_engine_from_url, init_db, make_session_factory
+from inventarios.db import create_engine_from_url, init_db, make_session_factory, warm_pool
 from inventarios.settings import Settings
 from inventarios.ui.web_server import create_app
 
 
+# EADDRINUSE, plus WSAEADDRINUSE (10048) which Windows reports as the errno.
+_ADDR_IN_USE = {errno.EADDRINUSE, 10048}
+
+# Deletion table for _get_hostname: drops every Latin-1 char that is not alnum, "-" or "_".
+_HOSTNAME_STRIP = str.maketrans(
+    "", "", "".join(chr(i) for i in range(256) if not (chr(i).isalnum() or chr(i) in "-_"))
+)
+
+
 def _is_frozen() -> bool:
     return bool(getattr(sys, "frozen", False))
 
@@ -26,7 +38,8 @@ def _msgbox(text: str, title: str) -> None:
 
 def _get_lan_ip() -> str:
     # Tries to infer the primary LAN IP by opening a UDP socket.
-    # Does not send data.
+    # connect() on UDP only asks the kernel for a route: no packet is sent and no DNS
+    # lookup happens, so it returns immediately even when offline.
     try:
         s = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
         try:
@@ -38,6 +51,15 @@ def _get_lan_ip() -> str:
             s.close()
     except Exception:
         pass
+    # No default route (e.g. a shop LAN without internet): use the addresses bound to
+    # this host's name. Local lookup only (hosts file / interfaces on Windows).
+    try:
+        for info in socket.getaddrinfo(socket.gethostname(), None, socket.AF_INET):
+            ip = info[4][0]
+            if ip and not ip.startswith("127."):
+                return ip
+    except Exception:
+        pass
     return "127.0.0.1"
 
 
@@ -45,25 +67,57 @@ def _get_hostname() -> str:
     try:
         name = socket.gethostname().strip()
         # Keep it simple/safe for URLs
-        name = "".join(ch for ch in name if (ch.isalnum() or ch in "-_"))
+        name = name.translate(_HOSTNAME_STRIP)
+        if not name.isascii():
+            # The table only covers Latin-1; filter anything beyond it char by char.
+            name = "".join(ch for ch in name if ch.isalnum() or ch in "-_")
         return name
     except Exception:
         return ""
 
 
-def _ensure_port_free(host: str, port: int) -> bool:
-    # Returns True if we can bind (port free), False otherwise.
-    # For 0.0.0.0 we bind INADDR_ANY which matches how Flask binds.
+def _bind_socket(host: str, port: int) -> socket.socket:
+    # Bind + listen ourselves: werkzeug's make_server reports a busy port with sys.exit(1)
+    # instead of raising, so hand it an already listening socket.
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
     try:
-        s = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
-        try:
-            s.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
-            s.bind((host, port))
-            return True
-        finally:
-            s.close()
+        if os.name != "nt":
+            # Same as werkzeug (rebind right after a restart). On Windows SO_REUSEADDR would
+            # let a second server bind the port in use.
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        sock.listen(128)
     except OSError:
-        return False
+        sock.close()
+        raise
+    return sock
+
+
+def _create_server(app, host: str, port: int, *, debug: bool) -> Callable[[], None]:
+    """Bind the listening socket now (OSError if the port is taken); return the serve loop."""
+    if debug:
+        # Reloader + debugger: the dev server binds (and reports a busy port) on its own.
+        return lambda: app.run(host=host, port=port, debug=True)
+
+    try:
+        # Production WSGI server with a worker thread pool (requirements.txt). A bare
+        # source checkout without it still falls back to werkzeug below.
+        from waitress import create_server
+    except ImportError:
+        create_server = None
+    if create_server is not None:
+        return create_server(app, host=host, port=port, threads=8, connection_limit=200).run
+
+    from werkzeug.serving import make_server
+
+    sock = _bind_socket(host, port)
+    try:
+        # make_server dups the descriptor, so ours can be closed right away.
+        srv = make_server(host, port, app, threaded=True, fd=sock.fileno())
+    finally:
+        sock.close()
+    return srv.serve_forever
 
 
 def main() -> int:
@@ -80,19 +134,12 @@ def main() -> int:
 
     show_ui = bool(args.ui or (_is_frozen() and not args.debug))
 
-    if not _ensure_port_free(args.host, args.port):
-        msg = f"El servidor ya está iniciado (o el puerto está ocupado): {args.host}:{args.port}"
-        if show_ui:
-            _msgbox(msg, "Inventarios - Servidor Tablet")
-        else:
-            print(msg)
-        return 2
-
     settings = Settings()
     settings.ensure_instance()
 
     engine = create_engine_from_url(settings.DATABASE_URL)
     init_db(engine)
+    warm_pool(engine)
     session_factory = make_session_factory(engine)
 
     app = create_app(session_factory, settings)
@@ -118,6 +165,20 @@ def main() -> int:
         + alt
         + "\n\nSi ya estaba abierto, ignora este mensaje."
     )
+    # No bind probe beforehand: the server's own bind is the check, so there is no window
+    # between probing and binding. Only announce the URL once the port is ours.
+    try:
+        serve = _create_server(app, args.host, args.port, debug=args.debug)
+    except OSError as e:
+        if e.errno not in _ADDR_IN_USE:
+            raise
+        msg = f"El servidor ya está iniciado (o el puerto está ocupado): {args.host}:{args.port}"
+        if show_ui:
+            _msgbox(msg, "Inventarios - Servidor Tablet")
+        else:
+            print(msg)
+        return 2
+
     if show_ui:
         # Don't block server startup waiting for the user to close the dialog.
         threading.Thread(
@@ -128,7 +189,7 @@ def main() -> int:
     else:
         print(msg)
 
-    app.run(host=args.host, port=args.port, debug=args.debug)
+    serve()
     return 0
 
 
@@ -7,7 +7,9 @@ ROOT = Path(__file__).resolve().parents[1]
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from inventarios.db import create_engine_from_url
+from sqlalchemy import event
+
+from inventarios.db import create_engine_from_url, init_db
 from inventarios.models import Base
 from inventarios.settings import Settings
 
@@ -16,8 +18,29 @@ def main() -> int:
     settings = Settings()
     engine = create_engine_from_url(settings.DATABASE_URL)
 
-    Base.metadata.drop_all(engine)
-    Base.metadata.create_all(engine)
+    sqlite = str(engine.url).startswith("sqlite:")
+    if sqlite:
+        # pysqlite runs DDL outside any transaction (each DROP/CREATE commits on its own).
+        # Take over transaction control so the reset below is all-or-nothing.
+        @event.listens_for(engine, "connect")
+        def _sqlite_manual_transactions(dbapi_conn, _record) -> None:
+            dbapi_conn.isolation_level = None
+            # Skip the per-DROP foreign key checks (the whole schema goes away anyway).
+            # Only changeable outside a transaction; this engine is private to the script.
+            dbapi_conn.execute("PRAGMA foreign_keys=OFF;")
+
+        @event.listens_for(engine, "begin")
+        def _sqlite_begin(conn) -> None:
+            conn.exec_driver_sql("BEGIN")
+
+    # Drop and recreate in a single transaction.
+    with engine.begin() as conn:
+        Base.metadata.drop_all(conn)
+        Base.metadata.create_all(conn)
+        if sqlite:
+            # Clear the schema stamp so init_db re-checks and re-stamps the new schema.
+            conn.exec_driver_sql("PRAGMA user_version = 0;")
+    init_db(engine)
 
     print("OK: database reset")
     return 0
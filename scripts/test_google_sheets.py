@@ -6,27 +6,174 @@ Este script te ayuda a:
 2. Probar la conexión con Google Sheets
 3. Exportar el inventario actual
 4. Importar desde Google Sheets
+
+Uso:
+  python scripts/test_google_sheets.py              # menú interactivo
+  python scripts/test_google_sheets.py export       # una operación y termina
+  python scripts/test_google_sheets.py import [--yes]
+  python scripts/test_google_sheets.py list
 """
 
+import argparse
 import sys
 from pathlib import Path
 
 # Agregar el directorio raíz al path
 sys.path.insert(0, str(Path(__file__).parent.parent))
 
-from inventarios.google_sheets import GoogleSheetsSync, GOOGLE_SHEETS_AVAILABLE
+# inventarios.google_sheets (googleapiclient, google-auth) se importa dentro de main:
+# --help y "list" no necesitan cargar las librerías de Google.
 from inventarios.settings import Settings
 from inventarios.db import create_engine_from_url, make_session_factory, session_scope, init_db
 from inventarios.repos import ProductRepo
-from inventarios.tipos_importacion import ProductoImportado
 
 
-def main():
+def cmd_export(sync, factory, url) -> int:
+    print("📤 Exportando inventario a Google Sheets...")
+    with session_scope(factory) as session:
+        repo = ProductRepo(session)
+        products = repo.list(limit=9999)
+
+        if not products:
+            print("⚠️  No hay productos en la base de datos local")
+            print()
+            return 1
+
+        print(f"   Encontrados {len(products)} productos")
+        success = sync.export_products(products)
+
+        if success:
+            print(f"✅ Exportación exitosa!")
+            print(f"   Ver en: {url}")
+        else:
+            print("❌ Error en la exportación")
+        print()
+        return 0 if success else 1
+
+
+def cmd_import(sync, factory, assume_yes: bool = False) -> int:
+    from inventarios.tipos_importacion import ProductoImportado
+
+    print("📥 Importando desde Google Sheets...")
+    products = sync.import_products()
+
+    if not products:
+        print("⚠️  No se encontraron productos en Google Sheets")
+        print("   O la hoja está vacía o hay un error")
+        print()
+        return 1
+
+    print(f"✅ Importados {len(products)} productos:")
+    for i, p in enumerate(products[:10], 1):
+        print(f"   {i}. {p.producto} - Stock: {p.unidades} - ${p.precio_final}")
+
+    if len(products) > 10:
+        print(f"   ... y {len(products) - 10} productos más")
+    print()
+
+    # Preguntar si actualizar la base de datos
+    if assume_yes:
+        respuesta = "s"
+    else:
+        respuesta = input("¿Actualizar base de datos con estos productos? (s/n): ").strip().lower()
+    if respuesta == "s":
+        with session_scope(factory) as session:
+            repo = ProductRepo(session)
+            imported = (
+                ProductoImportado(
+                    key=p.key,
+                    producto=p.producto,
+                    descripcion=p.descripcion,
+                    unidades=p.unidades,
+                    precio_final=p.precio_final
+                )
+                for p in products
+            )
+            count = repo.upsert_many(imported)
+            print(f"✅ Actualizados {count} productos en la base de datos")
+        print()
+    return 0
+
+
+def cmd_list(factory) -> int:
+    print("📦 Productos en base de datos local:")
+    with session_scope(factory) as session:
+        repo = ProductRepo(session)
+        products = repo.list(limit=20)
+
+        if not products:
+            print("   (vacío)")
+        else:
+            for i, p in enumerate(products, 1):
+                print(f"   {i}. {p.producto} - Stock: {p.unidades} - ${p.precio_final}")
+
+            total = repo.count()
+            if total > len(products):
+                print(f"   ... y {total - len(products)} productos más")
+        print()
+    return 0
+
+
+def interactive(sync, factory, url) -> int:
+    while True:
+        print("=" * 60)
+        print("Opciones:")
+        print("  1. Exportar inventario actual a Google Sheets")
+        print("  2. Importar desde Google Sheets")
+        print("  3. Ver productos en base de datos local")
+        print("  4. Salir")
+        print()
+        
+        opcion = input("Selecciona una opción (1-4): ").strip()
+        print()
+        
+        if opcion == "1":
+            cmd_export(sync, factory, url)
+        elif opcion == "2":
+            cmd_import(sync, factory)
+        elif opcion == "3":
+            cmd_list(factory)
+        elif opcion == "4":
+            print("👋 ¡Hasta luego!")
+            return 0
+        else:
+            print("❌ Opción inválida")
+            print()
+
+
+def _parse_args(argv=None):
+    p = argparse.ArgumentParser(
+        description="Prueba de integración con Google Sheets (sin subcomando abre el menú interactivo)"
+    )
+    sub = p.add_subparsers(dest="cmd")
+    sub.add_parser("export", help="Exportar inventario local a Google Sheets")
+    imp = sub.add_parser("import", help="Importar desde Google Sheets")
+    imp.add_argument("--yes", action="store_true", help="Actualizar la base de datos sin preguntar")
+    sub.add_parser("list", help="Ver productos en base de datos local")
+    return p.parse_args(argv)
+
+
+def main(argv=None):
+    args = _parse_args(argv)
+
     print("=" * 60)
     print("Google Sheets Integration - Test Script")
     print("=" * 60)
     print()
     
+    # Verificar configuración
+    settings = Settings()
+    
+    # Crear engine y session factory
+    engine = create_engine_from_url(settings.DATABASE_URL)
+    init_db(engine)
+    factory = make_session_factory(engine)
+
+    if args.cmd == "list":
+        return cmd_list(factory)
+
+    from inventarios.google_sheets import GoogleSheetsSync, GOOGLE_SHEETS_AVAILABLE
+
     # Verificar que las librerías estén instaladas
     if not GOOGLE_SHEETS_AVAILABLE:
         print("❌ ERROR: Las librerías de Google Sheets no están instaladas.")
@@ -39,13 +186,6 @@ def main():
     print("✅ Librerías de Google Sheets instaladas correctamente")
     print()
     
-    # Verificar configuración
-    settings = Settings()
-    
-    # Crear engine y session factory
-    engine = create_engine_from_url(settings.DATABASE_URL)
-    init_db(engine)
-    factory = make_session_factory(engine)
     print("📋 Configuración actual:")
     print(f"  GOOGLE_SHEETS_ENABLED: {settings.GOOGLE_SHEETS_ENABLED}")
     print(f"  GOOGLE_SHEETS_SPREADSHEET_ID: {settings.GOOGLE_SHEETS_SPREADSHEET_ID or '(no configurado)'}")
@@ -108,104 +248,11 @@ def main():
     print(f"📊 Spreadsheet URL: {url}")
     print()
     
-    # Menú de opciones
-    while True:
-        print("=" * 60)
-        print("Opciones:")
-        print("  1. Exportar inventario actual a Google Sheets")
-        print("  2. Importar desde Google Sheets")
-        print("  3. Ver productos en base de datos local")
-        print("  4. Salir")
-        print()
-        
-        opcion = input("Selecciona una opción (1-4): ").strip()
-        print()
-        
-        if opcion == "1":
-            # Exportar
-            print("📤 Exportando inventario a Google Sheets...")
-            with session_scope(factory) as session:
-                repo = ProductRepo(session)
-                products = repo.list(limit=9999)
-                
-                if not products:
-                    print("⚠️  No hay productos en la base de datos local")
-                    print()
-                    continue
-                
-                print(f"   Encontrados {len(products)} productos")
-                success = sync.export_products(products)
-                
-                if success:
-                    print(f"✅ Exportación exitosa!")
-                    print(f"   Ver en: {url}")
-                else:
-                    print("❌ Error en la exportación")
-                print()
-        
-        elif opcion == "2":
-            # Importar
-            print("📥 Importando desde Google Sheets...")
-            products = sync.import_products()
-            
-            if not products:
-                print("⚠️  No se encontraron productos en Google Sheets")
-                print("   O la hoja está vacía o hay un error")
-                print()
-                continue
-            
-            print(f"✅ Importados {len(products)} productos:")
-            for i, p in enumerate(products[:10], 1):
-                print(f"   {i}. {p.producto} - Stock: {p.unidades} - ${p.precio_final}")
-            
-            if len(products) > 10:
-                print(f"   ... y {len(products) - 10} productos más")
-            print()
-            
-            # Preguntar si actualizar la base de datos
-            respuesta = input("¿Actualizar base de datos con estos productos? (s/n): ").strip().lower()
-            if respuesta == "s":
-                with session_scope(factory) as session:
-                    repo = ProductRepo(session)
-                    imported = [
-                        ProductoImportado(
-                            key=p.key,
-                            producto=p.producto,
-                            descripcion=p.descripcion,
-                            unidades=p.unidades,
-                            precio_final=p.precio_final
-                        )
-                        for p in products
-                    ]
-                    count = repo.upsert_many(imported)
-                    print(f"✅ Actualizados {count} productos en la base de datos")
-                print()
-        
-        elif opcion == "3":
-            # Ver productos locales
-            print("📦 Productos en base de datos local:")
-            with session_scope(factory) as session:
-                repo = ProductRepo(session)
-                products = repo.list(limit=20)
-                
-                if not products:
-                    print("   (vacío)")
-                else:
-                    for i, p in enumerate(products, 1):
-                        print(f"   {i}. {p.producto} - Stock: {p.unidades} - ${p.precio_final}")
-                    
-                    total = len(repo.list(limit=9999))
-                    if total > len(products):
-                        print(f"   ... y {total - len(products)} productos más")
-                print()
-        
-        elif opcion == "4":
-            print("👋 ¡Hasta luego!")
-            return 0
-        
-        else:
-            print("❌ Opción inválida")
-            print()
+    if args.cmd == "export":
+        return cmd_export(sync, factory, url)
+    if args.cmd == "import":
+        return cmd_import(sync, factory, assume_yes=args.yes)
+    return interactive(sync, factory, url)
 
 
 if __name__ == "__main__":
@@ -1,12 +1,16 @@
 from __future__ import annotations
 
 import argparse
+import base64
+import functools
+import json
 import os
 import shutil
 import subprocess
 import sys
 import textwrap
 import venv
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
 
@@ -37,6 +41,10 @@ APP_BUILD_NAME = "InventariosPOS"
 INSTALLER_BUILD_NAME = "InstalarInventarios"
 SERVER_BUILD_NAME = "InventariosServer"
 
+# Stdlib packages neither EXE imports: skip them in PyInstaller's analysis and bundle.
+# (tkinter stays: the desktop app uses it for its file dialogs.)
+PYINSTALLER_EXCLUDES = ("test", "unittest", "pydoc_data")
+
 SERVER_EXE_CANDIDATES = [
     SERVER_EXE_CANONICAL_NAME,
     "Inventarios Server.exe",
@@ -62,15 +70,19 @@ def _is_frozen() -> bool:
     return bool(getattr(sys, "frozen", False))
 
 
+# The helpers below only probe the filesystem/shell folders, whose answers don't change
+# during one installer run: memoize them.
+@functools.cache
 def _bundle_root() -> Path:
     if _is_frozen() and getattr(sys, "_MEIPASS", None):
         return Path(str(sys._MEIPASS))  # type: ignore[attr-defined]
     return Path(__file__).resolve().parent
 
 
+@functools.cache
 def _default_install_dir() -> Path:
     base = os.environ.get("LOCALAPPDATA") or os.environ.get("APPDATA") or str(Path.home())
-    return (Path(base) / INSTALL_DIR_NAME).resolve()
+    return Path(base) / INSTALL_DIR_NAME
 
 
 def _ensure_dir(p: Path) -> None:
@@ -83,13 +95,72 @@ def _repo_root() -> Path:
 
 def _venv_python(venv_dir: Path) -> Path:
     # Windows layout; this project targets Windows for EXE/installer.
-    return (venv_dir / "Scripts" / "python.exe").resolve()
+    return venv_dir / "Scripts" / "python.exe"
+
+
+def _run(cmd: list[str], cwd: Path | None = None, env: dict[str, str] | None = None) -> None:
+    # Children write straight to our console (inherited stdout/stderr, no pipes); unbuffered
+    # so pip/PyInstaller progress shows as it happens. `env` adds/overrides variables.
+    child_env = {**os.environ, "PYTHONUNBUFFERED": "1", "PIP_DISABLE_PIP_VERSION_CHECK": "1", **(env or {})}
+    returncode = subprocess.run(cmd, cwd=str(cwd) if cwd else None, env=child_env).returncode
+    if returncode != 0:
+        raise RuntimeError(f"Falló comando (exit={returncode}): {' '.join(cmd)}")
+
+
+# Files up to this size (the icon) are compared byte for byte by _is_unchanged; bigger ones
+# (the 30-120 MB EXEs) by size + mtime.
+BYTE_COMPARE_MAX_SIZE = 1024 * 1024
+
+
+def _is_unchanged(src: Path, dst: Path) -> bool:
+    # dst was produced by an earlier install of the same file: copies keep the mtime, so
+    # size + mtime identify big EXEs; small files (icon) are just compared byte for byte.
+    try:
+        s, d = os.stat(src), os.stat(dst)
+    except OSError:
+        return False
+    if s.st_size != d.st_size:
+        return False
+    if s.st_size <= BYTE_COMPARE_MAX_SIZE:
+        return src.read_bytes() == dst.read_bytes()
+    return int(s.st_mtime) == int(d.st_mtime)
+
+
+def _fast_copy(src: Path, dst: Path) -> None:
+    # Same result as shutil.copy2 (contents + mtime/mode). Re-installs skip unchanged files.
+    if _is_unchanged(src, dst):
+        return
+    if os.name == "nt":
+        # CopyFileExW copies in the kernel (and keeps timestamps/attributes), instead of
+        # going through a Python read/write loop.
+        try:
+            import ctypes
 
+            if ctypes.windll.kernel32.CopyFileExW(str(src), str(dst), None, None, None, 0):
+                return
+        except Exception:
+            pass
+    # Elsewhere (and if CopyFileExW fails): copy2 already uses the platform's fast path
+    # (sendfile / fcopyfile, 1 MiB buffer on Windows).
+    shutil.copy2(src, dst)
 
-def _run(cmd: list[str], cwd: Path | None = None) -> None:
-    p = subprocess.run(cmd, cwd=str(cwd) if cwd else None)
-    if p.returncode != 0:
-        raise RuntimeError(f"Falló comando (exit={p.returncode}): {' '.join(cmd)}")
+
+def _first_existing(candidates: list[Path]) -> Path | None:
+    # One os.scandir per distinct folder instead of one stat per candidate; the candidates
+    # share a handful of parent folders. Returns the first candidate (in order) that exists.
+    listings: dict[Path, set[str]] = {}
+    for c in candidates:
+        names = listings.get(c.parent)
+        if names is None:
+            try:
+                with os.scandir(c.parent) as it:
+                    names = {os.path.normcase(e.name) for e in it}
+            except OSError:
+                names = set()
+            listings[c.parent] = names
+        if os.path.normcase(c.name) in names:
+            return c
+    return None
 
 
 def _find_source_app_exe() -> Path:
@@ -104,9 +175,9 @@ def _find_source_app_exe() -> Path:
             root / "dist" / APP_BUILD_NAME / exe_name,
         ]
 
-    for c in candidates:
-        if c.exists():
-            return c
+    found = _first_existing(candidates)
+    if found is not None:
+        return found
 
     raise FileNotFoundError(
         "No se encontró el EXE de la app. Esperado alguno de: "
@@ -115,6 +186,7 @@ def _find_source_app_exe() -> Path:
     )
 
 
+@functools.cache
 def _find_source_server_exe() -> Path | None:
     # Optional: older installers may not bundle the server EXE.
     root = _bundle_root()
@@ -127,25 +199,21 @@ def _find_source_server_exe() -> Path | None:
             root / "dist" / SERVER_BUILD_NAME / exe_name,
         ]
 
-    for c in candidates:
-        if c.exists():
-            return c
-    return None
+    return _first_existing(candidates)
 
 
+@functools.cache
 def _find_source_icon() -> Path | None:
     root = _bundle_root()
     candidates = [
         root / ICON_FILE_NAME,
         root / "assets" / ICON_FILE_NAME,
     ]
-    for c in candidates:
-        if c.exists():
-            return c
-    return None
+    return _first_existing(candidates)
 
 
 
+@functools.cache
 def _get_folder_path_csidl(csidl: int) -> Path | None:
     # Use SHGetFolderPathW (works on Windows 7+ and respects localized/redirected folders).
     try:
@@ -157,7 +225,7 @@ def _get_folder_path_csidl(csidl: int) -> Path | None:
         hr = ctypes.windll.shell32.SHGetFolderPathW(0, csidl, 0, 0, buf)
         if int(hr) != 0:
             return None
-        p = Path(buf.value).resolve()
+        p = Path(buf.value)
         if str(p):
             return p
         return None
@@ -165,27 +233,43 @@ def _get_folder_path_csidl(csidl: int) -> Path | None:
         return None
 
 
-def _create_shortcut_windows(shortcut_path: Path, target_path: Path, working_dir: Path, icon_path: Path | None) -> None:
-    # Prefer PowerShell COM because it's available on normal Windows machines.
+def _create_shortcut_windows(shortcuts: list[tuple[Path, Path, Path, Path | None]]) -> None:
+    # PowerShell COM (WScript.Shell), available on normal Windows machines. All shortcuts go
+    # in one powershell.exe run: its startup is what costs, not the COM calls.
     # IconLocation format: "C:\\path\\file.ico,0" or "C:\\path\\app.exe,0"
-    icon_loc = ""
-    if icon_path and icon_path.exists():
-        icon_loc = str(icon_path) + ",0"
-    else:
-        # Fallback to the icon embedded in the target exe.
-        icon_loc = str(target_path) + ",0"
+    defs = []
+    for shortcut_path, target_path, working_dir, icon_path in shortcuts:
+        if icon_path and icon_path.exists():
+            icon_loc = str(icon_path) + ",0"
+        else:
+            # Fallback to the icon embedded in the target exe.
+            icon_loc = str(target_path) + ",0"
+        defs.append(
+            {
+                "lnk": str(shortcut_path),
+                "target": str(target_path),
+                "wd": str(working_dir),
+                "icon": icon_loc,
+                "desc": APP_DISPLAY_NAME,
+            }
+        )
 
+    # JSON inside a single-quoted here-string: no PowerShell quoting/escaping involved.
     ps_command = (
-        "& { "
-        "param($lnk,$target,$wd,$icon,$desc) "
-        "$WshShell = New-Object -ComObject WScript.Shell; "
-        "$Shortcut = $WshShell.CreateShortcut($lnk); "
-        "$Shortcut.TargetPath = $target; "
-        "$Shortcut.WorkingDirectory = $wd; "
-        "if ($icon) { $Shortcut.IconLocation = $icon }; "
-        "if ($desc) { $Shortcut.Description = $desc }; "
-        "$Shortcut.Save(); "
-        "}"
+        "$defs = @'\n"
+        + json.dumps(defs)
+        + "\n'@ | ConvertFrom-Json\n"
+        "$WshShell = New-Object -ComObject WScript.Shell\n"
+        "$failed = 0\n"
+        "foreach ($s in $defs) { try { "
+        "$Shortcut = $WshShell.CreateShortcut($s.lnk); "
+        "$Shortcut.TargetPath = $s.target; "
+        "$Shortcut.WorkingDirectory = $s.wd; "
+        "if ($s.icon) { $Shortcut.IconLocation = $s.icon }; "
+        "if ($s.desc) { $Shortcut.Description = $s.desc }; "
+        "$Shortcut.Save() "
+        "} catch { $failed++ } }\n"
+        "exit $failed\n"
     )
 
     ps = [
@@ -193,43 +277,139 @@ def _create_shortcut_windows(shortcut_path: Path, target_path: Path, working_dir
         "-NoProfile",
         "-ExecutionPolicy",
         "Bypass",
-        "-Command",
-        ps_command,
-        "-Args",
-        str(shortcut_path),
-        str(target_path),
-        str(working_dir),
-        icon_loc,
-        APP_DISPLAY_NAME,
+        "-EncodedCommand",
+        base64.b64encode(ps_command.encode("utf-16-le")).decode("ascii"),
     ]
 
-    subprocess.run(ps, check=True, capture_output=True)
+    # Output isn't used: send it to DEVNULL instead of capturing it, and don't give the child
+    # a console window (no flash, no console allocation).
+    subprocess.run(
+        ps,
+        check=True,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+        creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+    )
 
 
+def _create_shortcuts_com(shortcuts: list[tuple[Path, Path, Path, Path | None]]) -> list[bool]:
+    # In-process IShellLinkW + IPersistFile (no powershell.exe per shortcut), all within one
+    # COM apartment. Returns one flag per shortcut; False ones should be retried another way.
+    import ctypes
+    from ctypes import wintypes
+
+    class GUID(ctypes.Structure):
+        _fields_ = [
+            ("Data1", wintypes.DWORD),
+            ("Data2", wintypes.WORD),
+            ("Data3", wintypes.WORD),
+            ("Data4", ctypes.c_ubyte * 8),
+        ]
+
+    ole32 = ctypes.OleDLL("ole32")
+
+    def guid(text: str) -> GUID:
+        g = GUID()
+        ole32.CLSIDFromString(ctypes.c_wchar_p(text), ctypes.byref(g))
+        return g
+
+    def method(index: int, *argtypes):
+        # COM vtable slot; HRESULT restype raises OSError on failure.
+        return ctypes.WINFUNCTYPE(ctypes.HRESULT, ctypes.c_void_p, *argtypes)(index, f"vtbl{index}")
+
+    query_interface = method(0, ctypes.POINTER(GUID), ctypes.POINTER(ctypes.c_void_p))
+    release = ctypes.WINFUNCTYPE(wintypes.ULONG, ctypes.c_void_p)(2, "Release")
+    # IShellLinkW
+    set_description = method(7, wintypes.LPCWSTR)
+    set_working_directory = method(9, wintypes.LPCWSTR)
+    set_icon_location = method(17, wintypes.LPCWSTR, ctypes.c_int)
+    set_path = method(20, wintypes.LPCWSTR)
+    # IPersistFile
+    save = method(6, wintypes.LPCWSTR, wintypes.BOOL)
+
+    clsid_shell_link = guid("{00021401-0000-0000-C000-000000000046}")
+    iid_shell_link = guid("{000214F9-0000-0000-C000-000000000046}")
+    iid_persist_file = guid("{0000010B-0000-0000-C000-000000000046}")
+
+    ole32.CoInitializeEx(None, 0x2)  # COINIT_APARTMENTTHREADED
+    results: list[bool] = []
+    try:
+        for shortcut_path, target_path, working_dir, icon_path in shortcuts:
+            link = ctypes.c_void_p()
+            persist = ctypes.c_void_p()
+            try:
+                ole32.CoCreateInstance(
+                    ctypes.byref(clsid_shell_link),
+                    None,
+                    0x1,  # CLSCTX_INPROC_SERVER
+                    ctypes.byref(iid_shell_link),
+                    ctypes.byref(link),
+                )
+                set_path(link, str(target_path))
+                set_working_directory(link, str(working_dir))
+                icon = icon_path if icon_path and icon_path.exists() else target_path
+                set_icon_location(link, str(icon), 0)
+                set_description(link, APP_DISPLAY_NAME)
+                query_interface(link, ctypes.byref(iid_persist_file), ctypes.byref(persist))
+                save(persist, str(shortcut_path), True)
+                results.append(True)
+            except OSError:
+                results.append(False)
+            finally:
+                if persist:
+                    release(persist)
+                if link:
+                    release(link)
+    finally:
+        ole32.CoUninitialize()
+    return results
+
+
+def _create_shortcuts(shortcuts: list[tuple[Path, Path, Path, Path | None]]) -> list[bool]:
+    # (shortcut_path, target_path, working_dir, icon_path) -> created?
+    try:
+        created = _create_shortcuts_com(shortcuts)
+    except Exception:
+        created = [False] * len(shortcuts)
+
+    # Fallback: PowerShell (one run), only for the ones COM couldn't create.
+    missing = [spec for spec, ok in zip(shortcuts, created) if not ok]
+    if missing:
+        try:
+            _create_shortcut_windows(missing)
+            return [True] * len(shortcuts)
+        except Exception:
+            # Exit code = number of failures; see which ones made it.
+            created = [ok or spec[0].exists() for spec, ok in zip(shortcuts, created)]
+    return created
+
+
+@functools.cache
 def _desktop_shortcut_path() -> Path:
     # CSIDL_DESKTOPDIRECTORY = 0x10
     desktop = _get_folder_path_csidl(0x10)
     if desktop:
-        return (desktop / f"{APP_DISPLAY_NAME}.lnk").resolve()
-    return Path(os.path.join(os.path.expanduser("~"), "Desktop", f"{APP_DISPLAY_NAME}.lnk")).resolve()
+        return desktop / f"{APP_DISPLAY_NAME}.lnk"
+    return Path(os.path.join(os.path.expanduser("~"), "Desktop", f"{APP_DISPLAY_NAME}.lnk"))
 
 
+@functools.cache
 def _startmenu_shortcut_path() -> Path:
     # Per-user Start Menu Programs (CSIDL_PROGRAMS = 0x2)
     programs = _get_folder_path_csidl(0x2)
     if programs:
-        return (programs / f"{APP_DISPLAY_NAME}.lnk").resolve()
+        return programs / f"{APP_DISPLAY_NAME}.lnk"
     base = os.environ.get("APPDATA")
     if not base:
         return Path("")
-    return (Path(base) / "Microsoft" / "Windows" / "Start Menu" / "Programs" / f"{APP_DISPLAY_NAME}.lnk").resolve()
+    return Path(base) / "Microsoft" / "Windows" / "Start Menu" / "Programs" / f"{APP_DISPLAY_NAME}.lnk"
 
 
 def _startup_shortcut_path(name: str) -> Path:
     # Per-user Startup folder (CSIDL_STARTUP = 0x7)
     startup = _get_folder_path_csidl(0x7)
     if startup:
-        return (startup / f"{name}.lnk").resolve()
+        return startup / f"{name}.lnk"
     base = os.environ.get("APPDATA")
     if not base:
         return Path("")
@@ -241,7 +421,7 @@ def _startup_shortcut_path(name: str) -> Path:
         / "Programs"
         / "Startup"
         / f"{name}.lnk"
-    ).resolve()
+    )
 
 
 def _install_from_exe(
@@ -253,60 +433,44 @@ def _install_from_exe(
 ) -> None:
     _ensure_dir(install_dir)
 
-    dst_exe = (install_dir / APP_EXE_CANONICAL_NAME).resolve()
-    shutil.copy2(source_exe, dst_exe)
+    dst_exe = install_dir / APP_EXE_CANONICAL_NAME
+    _fast_copy(source_exe, dst_exe)
 
     # Optional tablet server exe
     server_src = server_source_exe or _find_source_server_exe()
     server_dst = None
     if server_src and server_src.exists():
-        server_dst = (install_dir / SERVER_EXE_CANONICAL_NAME).resolve()
+        server_dst = install_dir / SERVER_EXE_CANONICAL_NAME
         try:
-            shutil.copy2(server_src, server_dst)
+            _fast_copy(server_src, server_dst)
         except Exception:
             server_dst = None
 
     src_icon = _find_source_icon()
     dst_icon = None
     if src_icon:
-        dst_icon = (install_dir / ICON_FILE_NAME).resolve()
+        dst_icon = install_dir / ICON_FILE_NAME
         try:
-            shutil.copy2(src_icon, dst_icon)
+            _fast_copy(src_icon, dst_icon)
         except Exception:
             dst_icon = None
 
-    # Shortcuts
-    shortcut_errors: list[str] = []
+    # Shortcuts: collect them all (label=None => failure is silent), then create them in one go.
+    shortcuts: list[tuple[str | None, Path, Path]] = []
     desktop = _desktop_shortcut_path()
     start = _startmenu_shortcut_path()
 
-    try:
-        _create_shortcut_windows(desktop, dst_exe, install_dir, dst_icon)
-    except Exception:
-        shortcut_errors.append("Escritorio")
-
-    try:
-        if str(start):
-            _ensure_dir(start.parent)
-            _create_shortcut_windows(start, dst_exe, install_dir, dst_icon)
-    except Exception:
-        shortcut_errors.append("Menú Inicio")
+    shortcuts.append(("Escritorio", desktop, dst_exe))
+    if str(start):
+        shortcuts.append(("Menú Inicio", start, dst_exe))
 
     # Tablet server shortcuts (if bundled)
     if server_dst and server_dst.exists():
-        try:
-            desktop_server = desktop.parent / f"{SERVER_DISPLAY_NAME}.lnk"
-            _create_shortcut_windows(desktop_server, server_dst, install_dir, dst_icon)
-        except Exception:
-            shortcut_errors.append("Escritorio (Servidor Tablet)")
-
-        try:
-            if str(start):
-                start_server = start.parent / f"{SERVER_DISPLAY_NAME}.lnk"
-                _ensure_dir(start_server.parent)
-                _create_shortcut_windows(start_server, server_dst, install_dir, dst_icon)
-        except Exception:
-            shortcut_errors.append("Menú Inicio (Servidor Tablet)")
+        shortcuts.append(("Escritorio (Servidor Tablet)", desktop.parent / f"{SERVER_DISPLAY_NAME}.lnk", server_dst))
+        if str(start):
+            shortcuts.append(
+                ("Menú Inicio (Servidor Tablet)", start.parent / f"{SERVER_DISPLAY_NAME}.lnk", server_dst)
+            )
 
         # Offer auto-start on login (Startup folder)
         try:
@@ -319,12 +483,24 @@ def _install_from_exe(
             if res == 6:  # IDYES
                 startup = _startup_shortcut_path(SERVER_DISPLAY_NAME)
                 if str(startup):
-                    _ensure_dir(startup.parent)
-                    _create_shortcut_windows(startup, server_dst, install_dir, dst_icon)
+                    # Non-fatal
+                    shortcuts.append((None, startup, server_dst))
         except Exception:
-            # Non-fatal
             pass
 
+    pending: list[tuple[str | None, Path, Path]] = []
+    shortcut_errors: list[str] = []
+    for label, lnk, target in shortcuts:
+        try:
+            _ensure_dir(lnk.parent)
+            pending.append((label, lnk, target))
+        except Exception:
+            if label:
+                shortcut_errors.append(label)
+
+    created = _create_shortcuts([(lnk, target, install_dir, dst_icon) for _, lnk, target in pending])
+    shortcut_errors += [label for (label, _, _), ok in zip(pending, created) if label and not ok]
+
     if shortcut_errors:
         _msgbox(
             "Instalación completada, pero no se pudo crear acceso directo en: "
@@ -351,31 +527,56 @@ def _install_from_exe(
             pass
 
 
+@functools.cache
+def _uv() -> str | None:
+    # uv (https://github.com/astral-sh/uv) is optional: much faster venv + installs.
+    return shutil.which("uv")
+
+
 def _ensure_venv(venv_dir: Path) -> Path:
     if not venv_dir.exists():
-        builder = venv.EnvBuilder(with_pip=True, clear=False, symlinks=False, upgrade=False)
-        builder.create(str(venv_dir))
+        uv = _uv()
+        if uv:
+            # --seed: still put pip in the venv for anyone using it by hand later.
+            _run([uv, "venv", str(venv_dir), "--python", sys.executable, "--seed"])
+        else:
+            builder = venv.EnvBuilder(with_pip=True, clear=False, symlinks=False, upgrade=False)
+            builder.create(str(venv_dir))
     py = _venv_python(venv_dir)
     if not py.exists():
         raise FileNotFoundError(f"No se encontró python del venv en: {py}")
     return py
 
 
-def _pip_install(py: Path, requirements: Path) -> None:
-    if not requirements.exists():
-        raise FileNotFoundError(f"No existe {requirements}")
-    _run([str(py), "-m", "pip", "install", "-r", str(requirements)])
+def _pip_install(py: Path, *requirements: Path) -> None:
+    # One install run for all files: a single resolve, and no .pyc compile step (PyInstaller
+    # compiles what it bundles anyway).
+    uv = _uv()
+    if uv:
+        # uv doesn't compile bytecode by default and prefers wheels on its own.
+        cmd = [uv, "pip", "install", "--python", str(py)]
+    else:
+        cmd = [str(py), "-m", "pip", "install", "--no-compile", "--prefer-binary", "--disable-pip-version-check"]
+    for req in requirements:
+        if not req.exists():
+            raise FileNotFoundError(f"No existe {req}")
+        cmd += ["-r", str(req)]
+    _run(cmd)
 
 
 def _clean_build_artifacts(repo_root: Path) -> None:
-    for name in ("build", "dist", "dist_installer"):
-        p = (repo_root / name).resolve()
+    # Three independent trees of many small files: delete them concurrently.
+    def _remove(name: str) -> None:
+        p = repo_root / name
         if p.exists():
             shutil.rmtree(p, ignore_errors=True)
 
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        list(ex.map(_remove, ("build", "dist", "dist_installer")))
+
 
 def _build_app_exe(py: Path, repo_root: Path, *, onefile: bool) -> Path:
-    icon = (repo_root / "assets" / ICON_FILE_NAME).resolve()
+    icon = repo_root / "assets" / ICON_FILE_NAME
     has_icon = icon.exists()
 
     add_data_web = "inventarios\\ui\\web;inventarios\\ui\\web"
@@ -391,6 +592,8 @@ def _build_app_exe(py: Path, repo_root: Path, *, onefile: bool) -> Path:
         "--windowed",
         "--name",
         APP_BUILD_NAME,
+        "--workpath",
+        f"build\\{APP_BUILD_NAME}",
         "--add-data",
         add_data_web,
         "--add-data",
@@ -402,28 +605,31 @@ def _build_app_exe(py: Path, repo_root: Path, *, onefile: bool) -> Path:
     if has_icon:
         cmd += ["--icon", str(icon)]
 
+    for module in PYINSTALLER_EXCLUDES:
+        cmd += ["--exclude-module", module]
+
     cmd += ["run_desktop.py"]
     _run(cmd, cwd=repo_root)
 
     if onefile:
-        exe = (repo_root / "dist" / f"{APP_BUILD_NAME}.exe").resolve()
+        exe = repo_root / "dist" / f"{APP_BUILD_NAME}.exe"
         if exe.exists():
             return exe
         # fallback if name differs
         for candidate in (repo_root / "dist").glob("*.exe"):
             if candidate.name.lower().startswith(APP_BUILD_NAME.lower()):
-                return candidate.resolve()
+                return candidate
         raise FileNotFoundError("PyInstaller terminó pero no encontré el EXE en dist/")
 
     # onedir
-    exe = (repo_root / "dist" / APP_BUILD_NAME / f"{APP_BUILD_NAME}.exe").resolve()
+    exe = repo_root / "dist" / APP_BUILD_NAME / f"{APP_BUILD_NAME}.exe"
     if exe.exists():
         return exe
     raise FileNotFoundError("PyInstaller terminó pero no encontré el EXE en dist/<name>/")
 
 
 def _build_server_exe(py: Path, repo_root: Path, *, onefile: bool) -> Path:
-    icon = (repo_root / "assets" / ICON_FILE_NAME).resolve()
+    icon = repo_root / "assets" / ICON_FILE_NAME
     has_icon = icon.exists()
 
     add_data_web = "inventarios\\ui\\web;inventarios\\ui\\web"
@@ -439,28 +645,38 @@ def _build_server_exe(py: Path, repo_root: Path, *, onefile: bool) -> Path:
         "--windowed",
         "--name",
         SERVER_BUILD_NAME,
+        "--workpath",
+        f"build\\{SERVER_BUILD_NAME}",
         "--add-data",
         add_data_web,
         "--add-data",
         add_data_assets,
+        # run_server imports waitress lazily (werkzeug fallback): make sure it is bundled.
+        "--hidden-import",
+        "waitress",
     ] + mode_args
 
     if has_icon:
         cmd += ["--icon", str(icon)]
 
+    for module in PYINSTALLER_EXCLUDES:
+        cmd += ["--exclude-module", module]
+
     cmd += ["run_server.py"]
-    _run(cmd, cwd=repo_root)
+    # Built concurrently with the app EXE: give it its own PyInstaller cache dir so the
+    # --clean of one build doesn't wipe the cache the other one is writing to.
+    _run(cmd, cwd=repo_root, env={"PYINSTALLER_CONFIG_DIR": str(repo_root / "build" / "pyinstaller-server")})
 
     if onefile:
-        exe = (repo_root / "dist" / f"{SERVER_BUILD_NAME}.exe").resolve()
+        exe = repo_root / "dist" / f"{SERVER_BUILD_NAME}.exe"
         if exe.exists():
             return exe
         for candidate in (repo_root / "dist").glob("*.exe"):
             if candidate.name.lower().startswith(SERVER_BUILD_NAME.lower()):
-                return candidate.resolve()
+                return candidate
         raise FileNotFoundError("PyInstaller (server) terminó pero no encontré el EXE en dist/")
 
-    exe = (repo_root / "dist" / SERVER_BUILD_NAME / f"{SERVER_BUILD_NAME}.exe").resolve()
+    exe = repo_root / "dist" / SERVER_BUILD_NAME / f"{SERVER_BUILD_NAME}.exe"
     if exe.exists():
         return exe
     raise FileNotFoundError("PyInstaller (server) terminó pero no encontré el EXE en dist/<name>/")
@@ -470,7 +686,7 @@ def _build_installer_exe(py: Path, repo_root: Path, app_exe: Path, server_exe: P
     if not app_exe.exists():
         raise FileNotFoundError(f"No se encontró AppExe: {app_exe}")
 
-    icon = (repo_root / "assets" / ICON_FILE_NAME).resolve()
+    icon = repo_root / "assets" / ICON_FILE_NAME
     has_icon = icon.exists()
 
     add_data_app = f"{app_exe};."
@@ -500,7 +716,7 @@ def _build_installer_exe(py: Path, repo_root: Path, app_exe: Path, server_exe: P
     cmd += ["installer.py"]
     _run(cmd, cwd=repo_root)
 
-    out = (repo_root / "dist_installer" / f"{INSTALLER_BUILD_NAME}.exe").resolve()
+    out = repo_root / "dist_installer" / f"{INSTALLER_BUILD_NAME}.exe"
     if not out.exists():
         raise FileNotFoundError("PyInstaller (installer) terminó pero no encontré el EXE en dist_installer/")
     return out
@@ -508,6 +724,33 @@ def _build_installer_exe(py: Path, repo_root: Path, app_exe: Path, server_exe: P
 
 def _prepare_runtime(py: Path, repo_root: Path) -> None:
     # Create instance folder + initialize SQLite schema without launching UI.
+    if py == Path(sys.executable):
+        # Already running on the target interpreter (--no-venv): do it in-process instead of
+        # paying another interpreter start + import of the package.
+        # This touches process-wide state (cwd, and os.environ via the .env loaded by
+        # inventarios.settings), so callers run it before starting any concurrent build.
+        prev_cwd = os.getcwd()
+        prev_env = dict(os.environ)
+        if str(repo_root) not in sys.path:
+            sys.path.insert(0, str(repo_root))
+        # Settings resolves instance/ and .env relative to the cwd, like the subprocess did.
+        os.chdir(repo_root)
+        try:
+            from inventarios.db import create_engine_from_url, init_db
+            from inventarios.settings import Settings
+
+            s = Settings()
+            s.ensure_instance()
+            e = create_engine_from_url(s.DATABASE_URL)
+            init_db(e)
+            e.dispose()
+        finally:
+            os.chdir(prev_cwd)
+            # Keep .env values out of the environment later subprocesses inherit.
+            os.environ.clear()
+            os.environ.update(prev_env)
+        return
+
     code = (
         "from inventarios.settings import Settings;"
         "from inventarios.db import create_engine_from_url, init_db;"
@@ -567,26 +810,45 @@ def _bootstrap_cli(argv: list[str]) -> int:
 
     # Choose python
     py = Path(sys.executable)
-    venv_dir = (repo_root / ".venv").resolve()
+    venv_dir = repo_root / ".venv"
     if not args.no_venv:
         py = _ensure_venv(venv_dir)
 
     # Dependencies
     if not args.no_deps:
-        _pip_install(py, (repo_root / "requirements.txt").resolve())
-        _pip_install(py, (repo_root / "requirements-dev.txt").resolve())
+        _pip_install(
+            py,
+            repo_root / "requirements.txt",
+            repo_root / "requirements-dev.txt",
+        )
 
-    # Prepare runtime (instance + sqlite schema)
-    if not args.no_prepare:
+    # Prepare runtime (instance + sqlite schema). On the current interpreter it runs
+    # in-process, which changes cwd/os.environ: do that before any build starts.
+    prepare_in_process = not args.no_prepare and py == Path(sys.executable)
+    if prepare_in_process:
         _prepare_runtime(py, repo_root)
 
-    # Build
     built_app_exe: Path | None = None
     built_server_exe: Path | None = None
-    if not args.no_build:
-        built_app_exe = _build_app_exe(py, repo_root, onefile=not args.onedir)
-        built_server_exe = _build_server_exe(py, repo_root, onefile=not args.onedir)
-        _build_installer_exe(py, repo_root, built_app_exe, built_server_exe)
+    with ThreadPoolExecutor(max_workers=3) as ex:
+        # The subprocess variant doesn't touch build artifacts or our process state, so it
+        # runs alongside the PyInstaller builds instead of before them.
+        prepare_job = None
+        if not args.no_prepare and not prepare_in_process:
+            prepare_job = ex.submit(_prepare_runtime, py, repo_root)
+
+        # Build
+        if not args.no_build:
+            # App and server EXEs are independent builds (own names/workpaths): run them at
+            # the same time. The installer bundles both, so it waits for them.
+            app_job = ex.submit(_build_app_exe, py, repo_root, onefile=not args.onedir)
+            server_job = ex.submit(_build_server_exe, py, repo_root, onefile=not args.onedir)
+            built_app_exe = app_job.result()
+            built_server_exe = server_job.result()
+            _build_installer_exe(py, repo_root, built_app_exe, built_server_exe)
+
+        if prepare_job is not None:
+            prepare_job.result()
 
     # Install (copy EXE + shortcuts)
     installed_exe: Path | None = None
@@ -597,20 +859,20 @@ def _bootstrap_cli(argv: list[str]) -> int:
             source_exe = built_app_exe
         else:
             # fallback to dist
-            source_exe = (repo_root / "dist" / f"{APP_BUILD_NAME}.exe").resolve()
+            source_exe = repo_root / "dist" / f"{APP_BUILD_NAME}.exe"
 
         install_dir = Path(args.install_dir).expanduser().resolve() if args.install_dir else _default_install_dir()
         server_source = built_server_exe
         if server_source is None:
-            server_source = (repo_root / "dist" / f"{SERVER_BUILD_NAME}.exe").resolve()
+            server_source = repo_root / "dist" / f"{SERVER_BUILD_NAME}.exe"
             if not server_source.exists():
                 server_source = None
         _install_from_exe(source_exe, install_dir, launch=True if args.run else None, server_source_exe=server_source)
-        installed_exe = (install_dir / APP_EXE_CANONICAL_NAME).resolve()
+        installed_exe = install_dir / APP_EXE_CANONICAL_NAME
 
     # Run without install: launch built EXE if available.
     if args.run and args.no_install:
-        to_run = built_app_exe or (repo_root / "dist" / f"{APP_BUILD_NAME}.exe").resolve()
+        to_run = built_app_exe or repo_root / "dist" / f"{APP_BUILD_NAME}.exe"
         if to_run.exists():
             subprocess.Popen([str(to_run)], cwd=str(to_run.parent))
         else: